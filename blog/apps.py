@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class BlogConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'blog'
-    verbose_name = 'المدونة'
\ No newline at end of file
+    verbose_name = 'المدونة'
+
+    def ready(self):
+        import blog.signals
@@ -0,0 +1,26 @@
+"""
+Validator for conditional GETs of blog posts (see config.conditional)
+
+The post and its comments give the modification time; the Post,
+BlogCategory and RelatedPost versions cover the category and related posts
+sidebar. The view counter is left out, as the anonymous page cache already
+serves it slightly stale.
+"""
+from django.db.models import OuterRef
+
+from config.cache import get_cache_versions
+from config.conditional import latest_change, newest, row_count
+from .models import BlogCategory, Post, PostComment, RelatedPost
+
+
+def post_validators(request, slug):
+    comments = PostComment.objects.filter(post=OuterRef('pk'))
+    post = Post.objects.filter(slug=slug, status='published').annotate(
+        comments_changed=latest_change(comments),
+        comments_total=row_count(comments, 'post'),
+    ).values('updated_at', 'comments_changed', 'comments_total').first()
+    if post is None:
+        return None
+
+    parts = (post['comments_total'], get_cache_versions([Post, BlogCategory, RelatedPost]))
+    return parts, newest(post['updated_at'], post['comments_changed'])
@@ -0,0 +1,106 @@
+"""
+Write-behind buffer for blog post view counts
+
+Reading a post only increments a counter in the shared cache (an atomic
+incr, so concurrent readers never lose a view nor wait on the post's row)
+and queues the post for the next flush the first time its counter becomes
+dirty. ``manage.py flush_post_views`` drains the queue and adds the
+buffered deltas to Post.views_count with a single batched UPDATE
+(``views_count = views_count + CASE ... END``) per batch of posts;
+the academy-flush-counters cron job in render.yaml runs it every minute.
+
+Posts are keyed by slug, so counting a view needs no query and the page
+itself can be served from the page cache. Counts for unknown or
+unpublished slugs are dropped at flush time. The displayed count lags by
+at most one flush interval (plus the page cache timeout).
+
+The buffer needs a cache with atomic increments that keep their expiry
+(settings.CACHE_ATOMIC_INCR, i.e. Redis). On any other backend, such as
+the database cache, each view is counted with a single
+``UPDATE ... views_count = views_count + 1`` instead, which is cheaper than
+the cache round trips and loses nothing.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, F, IntegerField, Value, When
+
+from config.cache import incr_counter
+
+VIEWS_KEY = 'blog:views:{}'
+DIRTY_KEY = 'blog:views:dirty:{}'
+QUEUE_KEY = 'blog:views:queue:{}'
+QUEUE_SEQ_KEY = 'blog:views:queue:seq'
+QUEUE_FLUSHED_KEY = 'blog:views:queue:flushed'
+
+VIEWS_TIMEOUT = 60 * 60 * 24 * 7
+# A post whose queue slot got lost is queued again once its flag expires
+DIRTY_TIMEOUT = 60 * 10
+
+
+def _digest(slug):
+    # Slugs may be non-ASCII; cache keys stay short and safe
+    return hashlib.md5(slug.encode()).hexdigest()
+
+
+def record_view(slug):
+    """Count one view of the post ``slug``, in the cache when it can buffer it"""
+    if not settings.CACHE_ATOMIC_INCR:
+        from .models import Post
+
+        Post.objects.filter(slug=slug, status='published').update(views_count=F('views_count') + 1)
+        return
+
+    digest = _digest(slug)
+    incr_counter(VIEWS_KEY.format(digest), 1, VIEWS_TIMEOUT)
+    if cache.add(DIRTY_KEY.format(digest), 1, DIRTY_TIMEOUT):
+        slot = incr_counter(QUEUE_SEQ_KEY, 1, VIEWS_TIMEOUT)
+        cache.set(QUEUE_KEY.format(slot), slug, VIEWS_TIMEOUT)
+
+
+def _take_views(slug):
+    key = VIEWS_KEY.format(_digest(slug))
+    views = cache.get(key) or 0
+    if views:
+        # decr rather than delete keeps views that raced the read
+        cache.decr(key, views)
+    return views
+
+
+def flush_post_views(batch_size=500):
+    """
+    Add every buffered view count to its post. Returns the number of views
+    flushed.
+    """
+    from .models import Post
+
+    last = cache.get(QUEUE_SEQ_KEY, 0)
+    flushed = cache.get(QUEUE_FLUSHED_KEY, 0)
+    if last < flushed:
+        # The sequence was evicted and restarted from 1
+        flushed = 0
+    slots = [QUEUE_KEY.format(n) for n in range(flushed + 1, last + 1)]
+    slugs = set(cache.get_many(slots).values())
+
+    # Clear the flags first: views arriving from now on queue again
+    cache.delete_many([DIRTY_KEY.format(_digest(slug)) for slug in slugs])
+    deltas = {slug: delta for slug in slugs if (delta := _take_views(slug))}
+
+    written = 0
+    items = sorted(deltas.items())
+    for start in range(0, len(items), batch_size):
+        batch = items[start:start + batch_size]
+        Post.objects.filter(
+            slug__in=[slug for slug, _delta in batch],
+            status='published',
+        ).update(views_count=F('views_count') + Case(
+            *(When(slug=slug, then=Value(delta)) for slug, delta in batch),
+            default=Value(0),
+            output_field=IntegerField(),
+        ))
+        written += sum(delta for _slug, delta in batch)
+
+    cache.delete_many(slots)
+    cache.set(QUEUE_FLUSHED_KEY, last, None)
+    return written
@@ -0,0 +1,63 @@
+"""
+RSS and Atom feeds of the newest published posts, per language
+(see config.feeds)
+"""
+from django.urls import reverse
+from django.utils.translation import gettext as _
+
+from config.feeds import FEED_ITEMS, AtomFeed, CachedFeed, RssFeed
+from config.localization import localized_related_fields
+from .models import BlogCategory, Post
+
+FEED_FIELDS = (
+    'id', 'slug', 'title', 'excerpt', 'published_at', 'updated_at',
+    'author__id', 'author__username', 'author__first_name', 'author__last_name',
+    'category__id', 'category__name', *localized_related_fields('category', 'name'),
+)
+
+
+class PostFeed(CachedFeed):
+    feed_name = 'blog'
+    cache_models = (Post, BlogCategory)
+
+    def title(self):
+        return _('مدونة الأكاديمية')
+
+    def link(self):
+        return reverse('blog:list')
+
+    def description(self, obj=None):
+        return _('أحدث المقالات المنشورة في مدونة الأكاديمية')
+
+    def items(self):
+        # Served by post_status_published_idx
+        return Post.objects.filter(
+            status='published',
+            published_at__isnull=False,
+        ).select_related('author', 'category').only(*FEED_FIELDS).order_by('-published_at')[:FEED_ITEMS]
+
+    def item_title(self, item):
+        return item.title
+
+    def item_description(self, item):
+        return item.excerpt
+
+    def item_pubdate(self, item):
+        return item.published_at
+
+    def item_updateddate(self, item):
+        return item.updated_at
+
+    def item_author_name(self, item):
+        return item.author.get_full_name()
+
+    def item_categories(self, item):
+        return [item.category.name] if item.category else []
+
+
+class PostRssFeed(RssFeed, PostFeed):
+    pass
+
+
+class PostAtomFeed(AtomFeed, PostFeed):
+    pass
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from blog.related import update_related_posts
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the stored related posts (config/related.py). Only posts '
+        'changed since the previous run and the lists they affect are updated '
+        'unless --full is given; run it periodically (e.g. hourly from cron)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Recompute every post, refreshing the term weights and '
+                 'refilling lists shortened by deleted posts',
+        )
+
+    def handle(self, *args, **options):
+        updated = update_related_posts(full=options['full'])
+        self.stdout.write(self.style.SUCCESS(f'Updated the related posts of {updated} post(s)'))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from blog.counters import flush_post_views
+
+
+class Command(BaseCommand):
+    help = (
+        'Add the blog post views buffered in the cache to Post.views_count; '
+        'run it periodically (e.g. every minute from cron)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Posts per batched UPDATE statement (default: 500)',
+        )
+
+    def handle(self, *args, **options):
+        views = flush_post_views(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Flushed {views} post view(s)'))
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.models import Post
+from blog.search import build_search_fields, search_fields
+from config.cache import bump_cache_version
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the plain-text search documents of every blog post from its '
+        'HTML content (blog/search.py); posts saved normally keep them current'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=200,
+            help='Posts loaded and updated per batch (default: 200)',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be positive')
+
+        columns = search_fields()
+        batch = []
+        updated = 0
+        for post in Post.objects.order_by('pk').iterator(chunk_size=batch_size):
+            for name, value in build_search_fields(post).items():
+                setattr(post, name, value)
+            batch.append(post)
+            if len(batch) >= batch_size:
+                updated += Post.objects.bulk_update(batch, columns)
+                batch = []
+        if batch:
+            updated += Post.objects.bulk_update(batch, columns)
+
+        # bulk_update sends no signals; cached search pages must not outlive the old documents
+        bump_cache_version(Post)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt the search documents of {updated} post(s)'))
@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.models import Post
+from blog.rendering import build_rendered_fields, rendered_fields
+from config.cache import bump_cache_version
+
+
+class Command(BaseCommand):
+    help = (
+        'Render the stored HTML, table of contents and word count of every '
+        'blog post again from its content (blog/rendering.py); posts saved '
+        'normally keep them current'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=200,
+            help='Posts loaded and updated per batch (default: 200)',
+        )
+        parser.add_argument(
+            '--missing', action='store_true',
+            help='Only render posts that have no stored HTML yet, e.g. after migrating',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be positive')
+
+        posts = Post.objects.order_by('pk')
+        if options['missing']:
+            posts = posts.filter(**{f'body_html_{settings.MODELTRANSLATION_DEFAULT_LANGUAGE}': ''})
+
+        columns = rendered_fields()
+        batch = []
+        updated = 0
+        for post in posts.iterator(chunk_size=batch_size):
+            for name, value in build_rendered_fields(post).items():
+                setattr(post, name, value)
+            batch.append(post)
+            if len(batch) >= batch_size:
+                updated += Post.objects.bulk_update(batch, columns)
+                batch = []
+        if batch:
+            updated += Post.objects.bulk_update(batch, columns)
+
+        # bulk_update sends no signals; cached post pages must not outlive the old rendering
+        bump_cache_version(Post)
+        self.stdout.write(self.style.SUCCESS(f'Rendered {updated} post(s)'))
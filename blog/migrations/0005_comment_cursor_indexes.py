@@ -0,0 +1,19 @@
+# Generated by Django 6.0.1 on 2026-10-18 00:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0004_hot_query_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='postcomment',
+            index=models.Index(fields=['post', 'is_approved', 'parent', 'created_at', 'id'], name='postcomment_cursor_idx'),
+        ),
+    ]
@@ -0,0 +1,151 @@
+# Generated manually to add the blog full-text search documents
+import re
+from html import unescape
+from html.parser import HTMLParser
+
+from django.db import migrations, models
+
+# Frozen copies of blog.search and courses.search as of this migration, so
+# later changes to the app code cannot break or alter it
+GIN_INDEX_NAME = 'post_search_{}_gin'
+SEARCH_CONFIG = 'simple'
+LANGUAGES = ('ar', 'en')
+FALLBACK_LANGUAGES = ('ar', 'en')
+
+ARABIC_DIACRITICS_RE = re.compile('[\u0610-\u061a\u064b-\u065f\u0670\u0640]')
+ARABIC_LETTER_FOLDS = str.maketrans({
+    'أ': 'ا',
+    'إ': 'ا',
+    'آ': 'ا',
+    'ٱ': 'ا',
+    'ؤ': 'و',
+    'ئ': 'ي',
+    'ى': 'ي',
+    'ة': 'ه',
+})
+TOKEN_RE = re.compile(r'[^\W_]+')
+
+SKIPPED_TAGS = {'script', 'style', 'template', 'noscript'}
+BLOCK_TAGS = {
+    'address', 'article', 'aside', 'blockquote', 'br', 'dd', 'div', 'dl', 'dt',
+    'figcaption', 'figure', 'footer', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'header', 'hr', 'img', 'li', 'ol', 'p', 'pre', 'section', 'table', 'td',
+    'th', 'tr', 'ul',
+}
+
+
+def normalize_text(text):
+    if not text:
+        return ''
+    text = ARABIC_DIACRITICS_RE.sub('', str(text).lower())
+    text = text.translate(ARABIC_LETTER_FOLDS)
+    return ' '.join(TOKEN_RE.findall(text))
+
+
+class TextExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED_TAGS:
+            self.skipping += 1
+        if tag in BLOCK_TAGS:
+            self.parts.append(' ')
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TAGS and self.skipping:
+            self.skipping -= 1
+        if tag in BLOCK_TAGS:
+            self.parts.append(' ')
+
+    def handle_data(self, data):
+        if not self.skipping:
+            self.parts.append(data)
+
+
+def html_to_text(html):
+    if not html:
+        return ''
+    parser = TextExtractor()
+    parser.feed(str(html))
+    parser.close()
+    return ' '.join(unescape(''.join(parser.parts)).split())
+
+
+def localized_value(post, field, language):
+    for code in (language, *FALLBACK_LANGUAGES):
+        value = getattr(post, f'{field}_{code}', None)
+        if value:
+            return value
+    return ''
+
+
+def populate_search_fields(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    posts = list(Post.objects.all())
+    for post in posts:
+        post.search_title = normalize_text(' '.join(
+            getattr(post, f'title_{language}', None) or '' for language in LANGUAGES
+        ))
+        for language in LANGUAGES:
+            setattr(post, f'search_text_{language}', normalize_text(' '.join((
+                localized_value(post, 'title', language),
+                localized_value(post, 'excerpt', language),
+                html_to_text(localized_value(post, 'content', language)),
+            ))))
+    fields = ['search_title'] + [f'search_text_{language}' for language in LANGUAGES]
+    Post.objects.bulk_update(posts, fields, batch_size=500)
+
+
+def create_search_indexes(apps, schema_editor):
+    # The GIN expression indexes are PostgreSQL-only, so they are created
+    # here rather than declared in Post.Meta.indexes
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    from django.contrib.postgres.indexes import GinIndex
+    from django.contrib.postgres.search import SearchVector
+
+    Post = apps.get_model('blog', 'Post')
+    for language in LANGUAGES:
+        vector = (
+            SearchVector('search_title', weight='A', config=SEARCH_CONFIG)
+            + SearchVector(f'search_text_{language}', weight='B', config=SEARCH_CONFIG)
+        )
+        schema_editor.add_index(Post, GinIndex(vector, name=GIN_INDEX_NAME.format(language)))
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for language in LANGUAGES:
+        name = schema_editor.quote_name(GIN_INDEX_NAME.format(language))
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0006_post_featured_image_derivatives'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='search_title',
+            field=models.TextField(blank=True, editable=False, verbose_name='نص البحث للعنوان'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='search_text_ar',
+            field=models.TextField(blank=True, editable=False, verbose_name='نص البحث بالعربية'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='search_text_en',
+            field=models.TextField(blank=True, editable=False, verbose_name='نص البحث بالإنجليزية'),
+        ),
+        migrations.RunPython(populate_search_fields, migrations.RunPython.noop),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 6.0.1 on 2026-10-18 00:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_post_search_document'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedPost',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='درجة التشابه')),
+                ('rank', models.PositiveSmallIntegerField(verbose_name='الترتيب')),
+                ('computed_at', models.DateTimeField(verbose_name='تاريخ الحساب')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_entries', to='blog.post', verbose_name='المقالة')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='blog.post', verbose_name='المقالة ذات الصلة')),
+            ],
+            options={
+                'verbose_name': 'مقالة ذات صلة',
+                'verbose_name_plural': 'المقالات ذات الصلة',
+                'ordering': ['post', 'rank'],
+                'constraints': [models.UniqueConstraint(fields=('post', 'rank'), name='relatedpost_post_rank_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 6.0.1 on 2026-10-18 00:34
+
+from django.db import migrations, models
+
+# Schema only: the existing posts are rendered by
+# `manage.py render_posts --missing`, which build.sh runs after migrating
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0008_related_posts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='body_html_ar',
+            field=models.TextField(blank=True, editable=False, verbose_name='المحتوى المعروض بالعربية'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='body_html_en',
+            field=models.TextField(blank=True, editable=False, verbose_name='المحتوى المعروض بالإنجليزية'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='toc_ar',
+            field=models.JSONField(blank=True, default=list, editable=False, verbose_name='جدول المحتويات بالعربية'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='toc_en',
+            field=models.JSONField(blank=True, default=list, editable=False, verbose_name='جدول المحتويات بالإنجليزية'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='word_count_ar',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='عدد الكلمات بالعربية'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='word_count_en',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='عدد الكلمات بالإنجليزية'),
+        ),
+    ]
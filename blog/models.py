@@ -66,6 +66,9 @@ class Post(models.Model):
         blank=True,
         null=True
     )
+    featured_image_derivatives = models.JSONField(
+        _('نسخ الصورة المميزة'), default=dict, blank=True, editable=False
+    )
 
     # Metadata
     status = models.CharField(
@@ -81,6 +84,19 @@ class Post(models.Model):
     meta_description = models.CharField(_('وصف ميتا'), max_length=160, blank=True)
     meta_keywords = models.CharField(_('كلمات مفتاحية'), max_length=255, blank=True)
 
+    # Normalized plain-text search documents, see blog.search
+    search_title = models.TextField(_('نص البحث للعنوان'), blank=True, editable=False)
+    search_text_ar = models.TextField(_('نص البحث بالعربية'), blank=True, editable=False)
+    search_text_en = models.TextField(_('نص البحث بالإنجليزية'), blank=True, editable=False)
+
+    # Content rendered at save time for the detail page, see blog.rendering
+    body_html_ar = models.TextField(_('المحتوى المعروض بالعربية'), blank=True, editable=False)
+    body_html_en = models.TextField(_('المحتوى المعروض بالإنجليزية'), blank=True, editable=False)
+    toc_ar = models.JSONField(_('جدول المحتويات بالعربية'), default=list, blank=True, editable=False)
+    toc_en = models.JSONField(_('جدول المحتويات بالإنجليزية'), default=list, blank=True, editable=False)
+    word_count_ar = models.PositiveIntegerField(_('عدد الكلمات بالعربية'), default=0, editable=False)
+    word_count_en = models.PositiveIntegerField(_('عدد الكلمات بالإنجليزية'), default=0, editable=False)
+
     # Timestamps
     created_at = models.DateTimeField(_('تاريخ الإنشاء'), auto_now_add=True)
     updated_at = models.DateTimeField(_('تاريخ التحديث'), auto_now=True)
@@ -90,10 +106,24 @@ class Post(models.Model):
         verbose_name = _('مقالة')
         verbose_name_plural = _('المقالات')
         ordering = ['-published_at', '-created_at']
+        indexes = [
+            models.Index(fields=['status', '-published_at'], name='post_status_published_idx'),
+            models.Index(fields=['status', 'is_featured'], name='post_status_featured_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        from .rendering import build_rendered_fields
+        from .search import build_search_fields
+        derived_fields = {**build_search_fields(self), **build_rendered_fields(self)}
+        for name, value in derived_fields.items():
+            setattr(self, name, value)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | set(derived_fields)
+        super().save(*args, **kwargs)
 
     def get_absolute_url(self):
         return reverse('blog:detail', kwargs={'slug': self.slug})
@@ -132,6 +162,45 @@ class PostComment(models.Model):
         verbose_name = _('تعليق')
         verbose_name_plural = _('التعليقات')
         ordering = ['created_at']
+        indexes = [
+            # Serves the (created_at, id) keyset pages of config.comments
+            models.Index(
+                fields=['post', 'is_approved', 'parent', 'created_at', 'id'],
+                name='postcomment_cursor_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.post.title}"
+
+
+class RelatedPost(models.Model):
+    """
+    Precomputed related posts of a post, best first (see config.related)
+    """
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='related_entries',
+        verbose_name=_('المقالة')
+    )
+    related = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name=_('المقالة ذات الصلة')
+    )
+    score = models.FloatField(_('درجة التشابه'))
+    rank = models.PositiveSmallIntegerField(_('الترتيب'))
+    computed_at = models.DateTimeField(_('تاريخ الحساب'))
+
+    class Meta:
+        verbose_name = _('مقالة ذات صلة')
+        verbose_name_plural = _('المقالات ذات الصلة')
+        ordering = ['post', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'rank'], name='relatedpost_post_rank_uniq'),
+        ]
 
     def __str__(self):
-        return f"{self.user.username} - {self.post.title}"
\ No newline at end of file
+        return f"{self.post_id} -> {self.related_id}"
@@ -0,0 +1,62 @@
+"""
+Related posts: TF-IDF over the titles and excerpts of published posts in
+every language, plus their category (see config.related)
+
+Posts without a stored list yet (new posts, or before the first
+compute_related_posts run) show the newest posts of their category.
+"""
+from django.conf import settings
+from modeltranslation.utils import build_localized_fieldname
+
+from config.localization import localized_related_fields
+from config.related import changed_since_last_run, document_tokens, recompute_related
+from courses.search import normalize_text
+from .models import Post, RelatedPost
+
+RELATED_POSTS_SHOWN = 3
+
+
+def _corpus():
+    excerpts = [
+        build_localized_fieldname('excerpt', code)
+        for code in settings.MODELTRANSLATION_LANGUAGES
+    ]
+    queryset = Post.objects.filter(status='published')
+    documents = {}
+    categories = {}
+    for pk, category_id, title, *texts in queryset.values_list(
+        'pk', 'category_id', 'search_title', *excerpts
+    ).iterator():
+        documents[pk] = document_tokens(title, normalize_text(' '.join(text or '' for text in texts)))
+        categories[pk] = category_id
+    return queryset, documents, categories
+
+
+def update_related_posts(full=False):
+    """Recompute the stored related posts; returns the number of posts updated"""
+    queryset, documents, categories = _corpus()
+    changed = None if full else changed_since_last_run(RelatedPost, 'post', queryset, documents)
+    return recompute_related(RelatedPost, 'post', documents, categories, changed)
+
+
+# The sidebar links the related posts by title
+RELATED_FIELDS = (
+    'post_id', 'related_id', 'rank', 'related__id', 'related__slug', 'related__published_at',
+    'related__title', *localized_related_fields('related', 'title'),
+)
+
+
+def get_related_posts(post, limit=RELATED_POSTS_SHOWN):
+    related = [
+        entry.related
+        for entry in RelatedPost.objects.filter(
+            post=post,
+            related__status='published',
+        ).select_related('related').only(*RELATED_FIELDS).order_by('rank')[:limit]
+    ]
+    if related or post.category_id is None:
+        return related
+    return list(Post.objects.filter(
+        status='published',
+        category_id=post.category_id,
+    ).exclude(pk=post.pk).only('id', 'slug', 'published_at', 'title').order_by('-published_at')[:limit])
@@ -0,0 +1,301 @@
+"""
+Save-time rendering of blog post content
+
+Post.content is TinyMCE HTML written by staff. Post.save() runs it through
+render_content() once per language and stores the result, so the detail
+page serves the stored values without parsing HTML per request:
+
+- ``body_html_<lang>``: the content reduced to an allowlist of tags,
+  attributes, URL schemes and inline styles, with lazy-loading and
+  responsive attributes on images and embeds, anchors on headings and
+  ``rel="noopener"`` on links opening a new tab
+- ``toc_<lang>``: the h2-h4 headings as [{'level', 'id', 'title'}]
+- ``word_count_<lang>``: for the reading time
+
+Each language falls back to the default language's content when its own
+is empty, like the displayed fields. ``manage.py render_posts`` renders the
+existing posts again after these rules change.
+"""
+import math
+import re
+from html.parser import HTMLParser
+from typing import NamedTuple
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+from django.utils.text import slugify
+
+from courses.search import TOKEN_RE
+from .search import BLOCK_TAGS, content_language, localized_value, search_languages
+
+WORDS_PER_MINUTE = 200
+
+GLOBAL_ATTRIBUTES = {'class', 'dir', 'lang', 'title', 'style'}
+ALLOWED_TAGS = {
+    'a': {'href', 'target', 'rel'},
+    'abbr': set(), 'b': set(), 'blockquote': {'cite'}, 'br': set(), 'caption': set(),
+    'code': set(), 'col': {'span'}, 'colgroup': {'span'}, 'dd': set(), 'del': set(),
+    'div': set(), 'dl': set(), 'dt': set(), 'em': set(), 'figcaption': set(),
+    'figure': set(), 'h1': set(), 'h2': set(), 'h3': set(), 'h4': set(), 'h5': set(),
+    'h6': set(), 'hr': set(), 'i': set(),
+    'iframe': {'src', 'width', 'height', 'allowfullscreen', 'allow'},
+    'img': {'src', 'alt', 'width', 'height'}, 'ins': set(), 'kbd': set(), 'li': set(),
+    'mark': set(), 'ol': {'start', 'type'}, 'p': set(), 'pre': set(), 'q': {'cite'},
+    's': set(), 'small': set(), 'source': {'src', 'type'}, 'span': set(),
+    'strong': set(), 'sub': set(), 'sup': set(), 'table': set(), 'tbody': set(),
+    'td': {'colspan', 'rowspan'}, 'tfoot': set(), 'th': {'colspan', 'rowspan', 'scope'},
+    'thead': set(), 'tr': set(), 'u': set(), 'ul': set(),
+    'video': {'src', 'controls', 'width', 'height', 'poster'},
+}
+# Elements that never have content nor an end tag
+VOID_TAGS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta',
+    'param', 'source', 'track', 'wbr',
+}
+# Dropped together with everything inside them; other unknown tags are
+# unwrapped and keep their text
+DROPPED_TAGS = {'script', 'style', 'template', 'noscript', 'object', 'embed', 'svg', 'math', 'title'}
+BOOLEAN_ATTRIBUTES = {'allowfullscreen', 'controls'}
+URL_ATTRIBUTES = {'href', 'src', 'cite', 'poster'}
+URL_SCHEMES = {'', 'http', 'https', 'mailto', 'tel'}
+MEDIA_URL_SCHEMES = {'', 'http', 'https'}
+ALLOWED_STYLES = {
+    'color', 'background-color', 'text-align', 'text-decoration', 'font-weight',
+    'font-style', 'float', 'width', 'height', 'margin', 'margin-left', 'margin-right',
+    'padding', 'padding-left', 'padding-right', 'border', 'vertical-align',
+}
+UNSAFE_STYLE_RE = re.compile(r'url\s*\(|expression\s*\(|[<>\\]', re.IGNORECASE)
+HEADING_TAGS = {'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
+TOC_TAGS = {'h2', 'h3', 'h4'}
+
+
+class RenderedContent(NamedTuple):
+    html: str
+    toc: list
+    word_count: int
+
+    @property
+    def reading_minutes(self):
+        return max(1, math.ceil(self.word_count / WORDS_PER_MINUTE))
+
+
+def _safe_url(value, schemes):
+    # Browsers ignore whitespace and control characters inside the scheme
+    compact = re.sub(r'[\x00-\x20]', '', value)
+    try:
+        scheme = urlsplit(compact).scheme.lower()
+    except ValueError:
+        return None
+    return value.strip() if scheme in schemes else None
+
+
+def _safe_style(value):
+    declarations = []
+    for declaration in value.split(';'):
+        name, _sep, style = declaration.partition(':')
+        name, style = name.strip().lower(), style.strip()
+        if name in ALLOWED_STYLES and style and not UNSAFE_STYLE_RE.search(style):
+            declarations.append(f'{name}: {style}')
+    return '; '.join(declarations)
+
+
+def _is_embed_allowed(src):
+    parts = urlsplit(src)
+    return parts.scheme == 'https' and parts.hostname in settings.BLOG_EMBED_HOSTS
+
+
+class _ContentRenderer(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.output = []
+        self.open_tags = []
+        # [tag, nesting depth] of the element being dropped with its content
+        self.dropping = None
+        # Kept text, split at block boundaries only, so that words broken by
+        # inline tags ("a<b>b</b>c") count once
+        self.text = []
+        self.toc = []
+        self.anchors = set()
+        # (tag, attributes html, output before the heading, heading text parts)
+        self.heading = None
+
+    def _emit(self, html):
+        self.output.append(html)
+
+    def _attributes(self, tag, attrs):
+        allowed = ALLOWED_TAGS[tag] | GLOBAL_ATTRIBUTES
+        values = {}
+        for name, value in attrs:
+            name = name.lower()
+            if name not in allowed or name in values:
+                continue
+            value = value or ''
+            if name in URL_ATTRIBUTES:
+                value = _safe_url(value, MEDIA_URL_SCHEMES if name != 'href' else URL_SCHEMES)
+                if value is None:
+                    continue
+            elif name == 'style':
+                value = _safe_style(value)
+                if not value:
+                    continue
+            values[name] = value
+
+        if tag == 'a' and values.get('target') == '_blank':
+            values['rel'] = 'noopener noreferrer'
+        elif tag == 'a':
+            values.pop('target', None)
+        if tag == 'img':
+            values.setdefault('alt', '')
+            values['loading'] = 'lazy'
+            values['decoding'] = 'async'
+            values['class'] = ' '.join(filter(None, (values.get('class'), 'img-fluid')))
+        if tag == 'iframe':
+            values['loading'] = 'lazy'
+        if tag == 'video':
+            values['preload'] = 'none'
+        if tag in ('iframe', 'video'):
+            values['class'] = ' '.join(filter(None, (values.get('class'), 'w-100')))
+        return values
+
+    def _format(self, values):
+        return ''.join(
+            f' {name}' if value == '' and name in BOOLEAN_ATTRIBUTES else f' {name}="{escape(value)}"'
+            for name, value in values.items()
+        )
+
+    def _drop(self, tag):
+        if tag not in VOID_TAGS:
+            self.dropping = [tag, 1]
+
+    def handle_starttag(self, tag, attrs):
+        if tag in BLOCK_TAGS:
+            self.text.append(' ')
+        if self.dropping is not None:
+            # Only the dropped tag itself nests; anything else inside it,
+            # balanced or not, goes with it
+            if tag == self.dropping[0]:
+                self.dropping[1] += 1
+            return
+        if tag in DROPPED_TAGS:
+            self._drop(tag)
+            return
+        if tag not in ALLOWED_TAGS:
+            return
+        values = self._attributes(tag, attrs)
+        if tag in ('img', 'source') and 'src' not in values:
+            return
+        if tag == 'iframe' and not _is_embed_allowed(values.get('src', '')):
+            self._drop(tag)
+            return
+        if tag in VOID_TAGS:
+            self._emit(f'<{tag}{self._format(values)}>')
+            return
+        if tag in HEADING_TAGS and self.heading is None:
+            # Emitted with its anchor once the heading's text is known
+            self.heading = (tag, self._format(values), self.output, [])
+            self.output = []
+            self.open_tags.append(tag)
+            return
+        self.open_tags.append(tag)
+        self._emit(f'<{tag}{self._format(values)}>')
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in BLOCK_TAGS:
+            self.text.append(' ')
+        if self.dropping is not None:
+            if tag == self.dropping[0]:
+                self.dropping[1] -= 1
+                if not self.dropping[1]:
+                    self.dropping = None
+            return
+        if tag not in self.open_tags:
+            return
+        # Close whatever the author left open inside this element
+        while self.open_tags:
+            open_tag = self.open_tags.pop()
+            if self.heading is not None and open_tag == self.heading[0]:
+                self._close_heading()
+            else:
+                self._emit(f'</{open_tag}>')
+            if open_tag == tag:
+                break
+
+    def _close_heading(self):
+        tag, attributes, before, text = self.heading
+        inner = ''.join(self.output)
+        title = ' '.join(''.join(text).split())
+        anchor = self._anchor(title)
+        self.output = before
+        self.heading = None
+        self._emit(f'<{tag} id="{anchor}"{attributes}>{inner}</{tag}>')
+        if tag in TOC_TAGS and title:
+            self.toc.append({'level': int(tag[1]), 'id': anchor, 'title': title})
+
+    def _anchor(self, title):
+        base = slugify(title, allow_unicode=True) or 'section'
+        anchor, suffix = base, 2
+        while anchor in self.anchors:
+            anchor = f'{base}-{suffix}'
+            suffix += 1
+        self.anchors.add(anchor)
+        return anchor
+
+    def handle_data(self, data):
+        if self.dropping is not None:
+            return
+        self.text.append(data)
+        if self.heading is not None:
+            self.heading[3].append(data)
+        self._emit(escape(data))
+
+    def render(self, html):
+        self.feed(html)
+        self.close()
+        self.dropping = None
+        if self.open_tags:
+            self.handle_endtag(self.open_tags[0])
+        words = len(TOKEN_RE.findall(''.join(self.text)))
+        return RenderedContent(''.join(self.output), self.toc, words)
+
+
+def render_content(html):
+    """Sanitize and annotate an HTML fragment; returns RenderedContent"""
+    if not html:
+        return RenderedContent('', [], 0)
+    return _ContentRenderer().render(str(html))
+
+
+def build_rendered_fields(post):
+    """Return {column: value} for every rendered column of a post"""
+    fields = {}
+    for language in search_languages():
+        rendered = render_content(localized_value(post, 'content', language))
+        fields[f'body_html_{language}'] = rendered.html
+        fields[f'toc_{language}'] = rendered.toc
+        fields[f'word_count_{language}'] = rendered.word_count
+    return fields
+
+
+def rendered_fields():
+    return [
+        f'{name}_{language}'
+        for language in search_languages()
+        for name in ('body_html', 'toc', 'word_count')
+    ]
+
+
+def get_rendered_content(post, language=None):
+    """The stored rendering of ``post`` in ``language`` (the active one by default)"""
+    language = content_language(language)
+    return RenderedContent(
+        mark_safe(getattr(post, f'body_html_{language}')),
+        getattr(post, f'toc_{language}'),
+        getattr(post, f'word_count_{language}'),
+    )
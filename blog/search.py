@@ -0,0 +1,245 @@
+"""
+Blog full-text search
+
+Post content is TinyMCE HTML, so matching it directly means scanning markup
+with LIKE on every search. Instead each post keeps normalized plain-text
+columns extracted from the HTML at save time: ``search_title`` with the
+titles in both languages (weight A) and one ``search_text_<lang>`` per
+modeltranslation language with that language's excerpt and content
+(weight B), falling back to the default language like the displayed fields
+do. On PostgreSQL the columns of the active language are matched through a
+GIN expression index and ranked with ts_rank; other databases (SQLite in
+tests) fall back to substring matching on the same columns, as
+courses.search does.
+
+Results carry a highlighted title and snippet built in Python from the
+excerpt, or from the matching part of the content's readable text when the
+excerpt does not contain a query term. Words are matched after
+normalization but displayed as written.
+"""
+from html import unescape
+from html.parser import HTMLParser
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.utils import translation
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from courses.search import SEARCH_CONFIG, TOKEN_RE, normalize_text
+
+GIN_INDEX_NAME = 'post_search_{}_gin'
+
+SNIPPET_WORDS = 30
+
+# Never part of the readable text
+SKIPPED_TAGS = {'script', 'style', 'template', 'noscript'}
+# Tags separating words: "<p>a</p><p>b</p>" reads "a b", "<b>a</b>b" reads "ab"
+BLOCK_TAGS = {
+    'address', 'article', 'aside', 'blockquote', 'br', 'dd', 'div', 'dl', 'dt',
+    'figcaption', 'figure', 'footer', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'header', 'hr', 'img', 'li', 'ol', 'p', 'pre', 'section', 'table', 'td',
+    'th', 'tr', 'ul',
+}
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED_TAGS:
+            self.skipping += 1
+        if tag in BLOCK_TAGS:
+            self.parts.append(' ')
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TAGS and self.skipping:
+            self.skipping -= 1
+        if tag in BLOCK_TAGS:
+            self.parts.append(' ')
+
+    def handle_data(self, data):
+        if not self.skipping:
+            self.parts.append(data)
+
+
+def html_to_text(html):
+    """Readable text of an HTML fragment, whitespace collapsed"""
+    if not html:
+        return ''
+    parser = _TextExtractor()
+    parser.feed(str(html))
+    parser.close()
+    return ' '.join(unescape(''.join(parser.parts)).split())
+
+
+def search_languages():
+    return settings.MODELTRANSLATION_LANGUAGES
+
+
+def content_language(language=None):
+    """``language`` (the active one by default) if posts are translated to it, else the default"""
+    language = (language or translation.get_language() or '').split('-')[0]
+    if language not in search_languages():
+        language = settings.MODELTRANSLATION_DEFAULT_LANGUAGE
+    return language
+
+
+def search_text_field(language=None):
+    """Name of the search text column for ``language`` (the active one by default)"""
+    return f'search_text_{content_language(language)}'
+
+
+def localized_value(post, field, language):
+    """``field`` of ``post`` in ``language``, falling back like modeltranslation"""
+    value = getattr(post, f'{field}_{language}', None)
+    if value:
+        return value
+    for fallback in settings.MODELTRANSLATION_FALLBACK_LANGUAGES:
+        value = getattr(post, f'{field}_{fallback}', None)
+        if value:
+            return value
+    return ''
+
+
+def build_search_fields(post):
+    """Return {column: value} for every search column of a post"""
+    fields = {
+        'search_title': normalize_text(' '.join(
+            getattr(post, f'title_{language}', None) or '' for language in search_languages()
+        )),
+    }
+    for language in search_languages():
+        fields[search_text_field(language)] = normalize_text(' '.join((
+            localized_value(post, 'title', language),
+            localized_value(post, 'excerpt', language),
+            html_to_text(localized_value(post, 'content', language)),
+        )))
+    return fields
+
+
+def search_fields():
+    return ['search_title'] + [search_text_field(language) for language in search_languages()]
+
+
+def search_vector(language=None):
+    from django.contrib.postgres.search import SearchVector
+
+    return (
+        SearchVector('search_title', weight='A', config=SEARCH_CONFIG)
+        + SearchVector(search_text_field(language), weight='B', config=SEARCH_CONFIG)
+    )
+
+
+def search_indexes():
+    """
+    One GIN index per language over the exact vector expression used by
+    search_posts(), so PostgreSQL can match it against the WHERE clause.
+    """
+    from django.contrib.postgres.indexes import GinIndex
+
+    return [
+        GinIndex(search_vector(language), name=GIN_INDEX_NAME.format(language))
+        for language in search_languages()
+    ]
+
+
+def search_tokens(query):
+    return normalize_text(query).split()
+
+
+def search_posts(queryset, query):
+    """
+    Filter ``queryset`` to posts matching ``query`` in the active language
+    and annotate ``search_rank``. Every query term must match, the last one
+    as a prefix.
+    """
+    tokens = search_tokens(query)
+    if not tokens:
+        return queryset.none()
+    text_field = search_text_field()
+
+    if connections[queryset.db].vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+
+        terms = [f'{token}:*' if i == len(tokens) - 1 else token for i, token in enumerate(tokens)]
+        ts_query = SearchQuery(' & '.join(terms), config=SEARCH_CONFIG, search_type='raw')
+        return queryset.alias(
+            search=search_vector()
+        ).filter(
+            search=ts_query
+        ).annotate(
+            search_rank=SearchRank(search_vector(), ts_query)
+        )
+
+    condition = Q()
+    title_hits = Q()
+    for token in tokens:
+        condition &= Q(search_title__contains=token) | Q(**{f'{text_field}__contains': token})
+        title_hits &= Q(search_title__contains=token)
+    return queryset.filter(condition).annotate(
+        search_rank=Case(
+            When(title_hits, then=Value(2)),
+            default=Value(1),
+            output_field=IntegerField(),
+        )
+    )
+
+
+def _is_hit(word, tokens):
+    word = normalize_text(word)
+    return bool(word) and any(word.startswith(token) for token in tokens)
+
+
+def highlight(text, tokens):
+    """
+    Escape ``text`` and wrap the words matching any of ``tokens`` (by
+    prefix, after normalization) in <mark>. Returns (html, hit_found).
+    """
+    text = text or ''
+    parts = []
+    position = 0
+    found = False
+    for match in TOKEN_RE.finditer(text):
+        if _is_hit(match.group(), tokens):
+            parts.append(escape(text[position:match.start()]))
+            parts.append(f'<mark>{escape(match.group())}</mark>')
+            position = match.end()
+            found = True
+    parts.append(escape(text[position:]))
+    return mark_safe(''.join(parts)), found
+
+
+def _text_snippet(text, tokens):
+    words = (text or '').split()
+    for index, word in enumerate(words):
+        if _is_hit(word, tokens):
+            start = max(index - SNIPPET_WORDS // 3, 0)
+            snippet = ' '.join(words[start:start + SNIPPET_WORDS])
+            prefix = '… ' if start else ''
+            suffix = ' …' if start + SNIPPET_WORDS < len(words) else ''
+            return prefix + snippet + suffix
+    return None
+
+
+def highlight_results(posts, query):
+    """
+    Set ``search_title_html`` and ``search_snippet_html`` on each post of a
+    search results page
+    """
+    tokens = search_tokens(query)
+    language = content_language()
+    for post in posts:
+        post.search_title_html, _found = highlight(post.title, tokens)
+        snippet, found = highlight(post.excerpt, tokens)
+        if not found:
+            content = html_to_text(localized_value(post, 'content', language))
+            text = _text_snippet(content, tokens)
+            if text is not None:
+                snippet, found = highlight(text, tokens)
+        post.search_snippet_html = snippet
+    return posts
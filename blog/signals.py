@@ -0,0 +1,28 @@
+"""
+Signal receivers keeping the anonymous page cache versions and the image
+derivatives up to date
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from config.cache import bump_cache_version
+from config.images import schedule_derivatives
+from .models import BlogCategory, Post, PostComment
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=BlogCategory)
+@receiver(post_save, sender=PostComment)
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=BlogCategory)
+@receiver(post_delete, sender=PostComment)
+def invalidate_page_cache(sender, **kwargs):
+    # After commit, or a request in between would cache the old rows under the new version
+    transaction.on_commit(lambda: bump_cache_version(sender))
+
+
+@receiver(post_save, sender=Post)
+def generate_featured_image_derivatives(sender, instance, raw=False, update_fields=None, **kwargs):
+    if not raw:
+        schedule_derivatives(instance, 'featured_image', update_fields)
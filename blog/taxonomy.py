@@ -0,0 +1,20 @@
+"""
+Cached blog category taxonomy (see config.taxonomy)
+"""
+from django.db.models import Q
+
+from config.taxonomy import CategorySnapshot
+from .models import BlogCategory, Post
+
+category_snapshot = CategorySnapshot(
+    BlogCategory, Post, 'posts', Q(posts__status='published'), 'post_count',
+)
+
+
+def get_categories(with_posts=False):
+    """All blog categories annotated with ``post_count``, ordered by name"""
+    return category_snapshot.list(non_empty=with_posts)
+
+
+def get_category_or_404(slug):
+    return category_snapshot.get_or_404(slug)
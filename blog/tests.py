@@ -1,3 +1,283 @@
-from django.test import TestCase
+from io import StringIO
 
-# Create your tests here.
+from django.contrib import messages
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import cache
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.middleware.csrf import _does_token_match
+from django.template import engines
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from config.cache import CACHE_HEADER, CSRF_INPUT_RE, cache_anonymous_page, get_cache_versions
+from config.related import RelatedIndex
+from .counters import flush_post_views, record_view
+from .models import BlogCategory, Post, RelatedPost
+from .related import get_related_posts, update_related_posts
+from .rendering import render_content
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def create_post(slug='post', **fields):
+    author = get_user_model().objects.create_user(f'author-{slug}', f'{slug}@example.com', 'pass')
+    fields = {
+        'title': slug,
+        'excerpt': slug,
+        'content': f'<p>{slug}</p>',
+        'status': 'published',
+        'published_at': timezone.now(),
+        **fields,
+    }
+    return Post.objects.create(slug=slug, author=author, **fields)
+
+
+class RenderContentTests(SimpleTestCase):
+    def test_script_content_is_dropped(self):
+        rendered = render_content('<p>a</p><script>alert("<p>x</p>")</script><p>b</p>')
+        self.assertEqual(rendered.html, '<p>a</p><p>b</p>')
+        self.assertEqual(rendered.word_count, 2)
+
+    def test_inline_tags_do_not_split_words(self):
+        self.assertEqual(render_content('<p>a<b>b</b>c</p>').word_count, 1)
+        self.assertEqual(render_content('<p>one <em>two</em></p><p>three<br>four</p>').word_count, 4)
+
+    def test_embed_does_not_swallow_the_rest(self):
+        rendered = render_content('<p>intro</p><embed src="x"><p>rest</p>')
+        self.assertEqual(rendered.html, '<p>intro</p><p>rest</p>')
+
+    def test_self_closed_embed(self):
+        rendered = render_content('<p>intro</p><embed src="x" /><p>rest</p>')
+        self.assertEqual(rendered.html, '<p>intro</p><p>rest</p>')
+
+    def test_unclosed_children_inside_object(self):
+        rendered = render_content('<object><p>a</object><p>b</p>')
+        self.assertEqual(rendered.html, '<p>b</p>')
+
+    def test_unclosed_children_inside_svg(self):
+        rendered = render_content('<svg><g><text>x</svg><p>b</p>')
+        self.assertEqual(rendered.html, '<p>b</p>')
+
+    def test_nested_dropped_tag(self):
+        rendered = render_content('<svg><svg></svg><p>x</p></svg><p>b</p>')
+        self.assertEqual(rendered.html, '<p>b</p>')
+
+    def test_disallowed_iframe_fallback_is_dropped(self):
+        rendered = render_content('<iframe src="https://evil.example/"><p>x</p></iframe><p>b</p>')
+        self.assertEqual(rendered.html, '<p>b</p>')
+
+    def test_unsafe_urls_are_removed(self):
+        rendered = render_content('<a href=" java\nscript:alert(1)">x</a><img src="javascript:x">')
+        self.assertEqual(rendered.html, '<a>x</a>')
+
+    def test_headings_get_unique_anchors_and_toc(self):
+        rendered = render_content('<h2>Intro</h2><h3>Intro</h3><h5>Skip</h5>')
+        self.assertEqual(
+            rendered.html,
+            '<h2 id="intro">Intro</h2><h3 id="intro-2">Intro</h3><h5 id="skip">Skip</h5>',
+        )
+        self.assertEqual(rendered.toc, [
+            {'level': 2, 'id': 'intro', 'title': 'Intro'},
+            {'level': 3, 'id': 'intro-2', 'title': 'Intro'},
+        ])
+
+
+class PostViewCounterTests(TestCase):
+    @override_settings(CACHE_ATOMIC_INCR=False)
+    def test_views_are_written_directly_without_atomic_cache(self):
+        post = create_post()
+        with self.assertNumQueries(1):
+            record_view(post.slug)
+        record_view(post.slug)
+        post.refresh_from_db()
+        self.assertEqual(post.views_count, 2)
+
+    @override_settings(CACHE_ATOMIC_INCR=True, CACHES=LOCMEM_CACHE)
+    def test_buffered_views_are_flushed(self):
+        cache.clear()
+        post = create_post()
+        with self.assertNumQueries(0):
+            for _ in range(5):
+                record_view(post.slug)
+        record_view('unknown')
+        post.refresh_from_db()
+        self.assertEqual(post.views_count, 0)
+
+        self.assertEqual(flush_post_views(), 6)
+        post.refresh_from_db()
+        self.assertEqual(post.views_count, 5)
+        # Nothing is applied twice
+        flush_post_views()
+        post.refresh_from_db()
+        self.assertEqual(post.views_count, 5)
+
+
+class RenderPostsCommandTests(TestCase):
+    def test_missing_only_renders_posts_without_html(self):
+        stale = create_post('stale')
+        fresh = create_post('fresh')
+        Post.objects.filter(pk=stale.pk).update(body_html_ar='', body_html_en='', word_count_ar=0)
+        Post.objects.filter(pk=fresh.pk).update(body_html_ar='<p>kept</p>')
+
+        out = StringIO()
+        call_command('render_posts', '--missing', stdout=out)
+        self.assertIn('Rendered 1 post(s)', out.getvalue())
+
+        stale.refresh_from_db()
+        fresh.refresh_from_db()
+        self.assertEqual(stale.body_html_ar, '<p>stale</p>')
+        self.assertEqual(stale.word_count_ar, 1)
+        self.assertEqual(fresh.body_html_ar, '<p>kept</p>')
+
+
+class PageCacheInvalidationTests(TestCase):
+    @override_settings(CACHES=LOCMEM_CACHE)
+    def test_version_is_bumped_after_commit(self):
+        cache.clear()
+        post = create_post()
+        before = get_cache_versions([Post])
+        with self.captureOnCommitCallbacks() as callbacks:
+            post.title = 'edited'
+            post.save()
+            # A request before the commit still reads the old rows
+            self.assertEqual(get_cache_versions([Post]), before)
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(get_cache_versions([Post]), before)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class AnonymousPageCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+        template = engines['django'].from_string('<form>{% csrf_token %}</form>')
+
+        @cache_anonymous_page(Post)
+        def view(request):
+            self.calls += 1
+            return HttpResponse(template.render(request=request))
+        self.view = view
+
+    def _get(self):
+        request = RequestFactory().get('/blog/')
+        request.user = AnonymousUser()
+        request._messages = CookieStorage(request)
+        return request
+
+    def _token(self, request, response):
+        """The token rendered into the page, checked against the visitor's secret"""
+        token = CSRF_INPUT_RE.search(response.content).group(1).decode()
+        self.assertTrue(_does_token_match(token, request.META['CSRF_COOKIE']))
+        return token
+
+    def test_each_visitor_gets_their_own_csrf_token(self):
+        first = self._get()
+        response = self.view(first)
+        self.assertEqual(response[CACHE_HEADER], 'MISS')
+        first_token = self._token(first, response)
+
+        second = self._get()
+        response = self.view(second)
+        self.assertEqual(response[CACHE_HEADER], 'HIT')
+        self.assertEqual(self.calls, 1)
+        self.assertNotEqual(self._token(second, response), first_token)
+        self.assertNotEqual(first.META['CSRF_COOKIE'], second.META['CSRF_COOKIE'])
+
+    def test_pending_messages_skip_the_cache(self):
+        request = self._get()
+        messages.info(request, 'saved')
+        response = self.view(request)
+        self.assertNotIn(CACHE_HEADER, response)
+
+        response = self.view(self._get())
+        self.assertEqual(response[CACHE_HEADER], 'MISS')
+        self.assertEqual(self.calls, 2)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class PostFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('blog:rss_feed')
+
+    def test_etag_changes_on_publish(self):
+        create_post('first')
+        draft = create_post('second', status='draft', published_at=None)
+        response = self.client.get(self.url)
+        self.assertNotContains(response, 'second')
+        etag = response['ETag']
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            draft.status = 'published'
+            draft.published_at = timezone.now()
+            draft.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'second')
+
+
+class SearchSnippetTests(TestCase):
+    def test_snippet_is_cut_from_the_readable_content(self):
+        create_post('orm', excerpt='intro short', content="<p>Django's ORM, explained: QuerySets</p>")
+        response = self.client.get(reverse('blog:list'), {'q': 'querysets'})
+        post = response.context['page_obj'][0]
+        self.assertEqual(
+            post.search_snippet_html,
+            'Django&#x27;s ORM, explained: <mark>QuerySets</mark>',
+        )
+
+
+class RelatedIndexTests(SimpleTestCase):
+    def test_top_ranks_by_similarity(self):
+        index = RelatedIndex(
+            {1: ['django', 'orm', 'queryset'], 2: ['django', 'orm'], 3: ['django'], 4: ['cooking']},
+            {},
+        )
+        self.assertEqual([pk for pk, _score in index.top(1)], [2, 3])
+        self.assertEqual(index.top(4), [])
+
+    def test_category_bonus_and_ties(self):
+        index = RelatedIndex({1: ['django'], 2: ['cooking'], 3: ['baking']}, {1: 7, 2: 7, 3: 7})
+        # Only the category relates them; the newer item wins the tie
+        self.assertEqual([pk for pk, _score in index.top(1)], [3, 2])
+        self.assertEqual([pk for pk, _score in index.top(1, limit=1)], [3])
+
+
+class RelatedPostsTests(TestCase):
+    def setUp(self):
+        self.category = BlogCategory.objects.create(name='web', slug='web')
+
+    def _related(self, post):
+        return [related.slug for related in get_related_posts(post)]
+
+    def test_falls_back_to_newest_in_category_before_the_first_run(self):
+        post = create_post('post', category=self.category)
+        create_post('other', category=self.category)
+        create_post('elsewhere')
+        self.assertEqual(self._related(post), ['other'])
+
+    def test_incremental_run_updates_affected_lists(self):
+        django = create_post('django', title='python django orm', excerpt='django orm')
+        flask = create_post('flask', title='python flask routing', excerpt='flask views')
+        cooking = create_post('cooking', title='cooking pasta', excerpt='pasta sauce')
+        self.assertEqual(update_related_posts(full=True), 3)
+        self.assertEqual(self._related(django), ['flask'])
+        self.assertEqual(self._related(cooking), [])
+
+        # The edited post now shares terms with "django" but not with "flask"
+        cooking.title = 'django orm cooking'
+        cooking.save()
+        self.assertEqual(update_related_posts(), 2)
+        self.assertEqual(self._related(django), ['cooking', 'flask'])
+        self.assertEqual(self._related(cooking), ['django'])
+        self.assertEqual(self._related(flask), ['django'])
+        # Nothing changed since
+        self.assertEqual(update_related_posts(), 0)
@@ -1,10 +1,13 @@
 from django.urls import path
-from . import views
+from . import feeds, views
 
 app_name = 'blog'
 
 urlpatterns = [
     path('', views.blog_list_view, name='list'),
+    path('feed/rss/', feeds.PostRssFeed(), name='rss_feed'),
+    path('feed/atom/', feeds.PostAtomFeed(), name='atom_feed'),
     path('post/<slug:slug>/', views.blog_detail_view, name='detail'),
+    path('post/<slug:slug>/comments/', views.load_more_comments, name='load_more_comments'),
     path('category/<slug:slug>/', views.blog_category_view, name='category'),
 ]
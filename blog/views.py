@@ -5,12 +5,24 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.utils.translation import gettext_lazy as _
-from django.db.models import Q, Count
+from django.db.models import Count
 from django.core.paginator import Paginator
-from .models import Post, BlogCategory, PostComment
+from .models import Post, BlogCategory, PostComment, RelatedPost
 from .forms import PostCommentForm
+from .taxonomy import get_categories, get_category_or_404
+from .counters import record_view
+from .related import get_related_posts
+from .rendering import get_rendered_content
+from .search import highlight_results, search_fields, search_posts
+from .conditional import post_validators
+from config.cache import cache_anonymous_page
+from config.conditional import conditional_page
+from config.comments import load_comment_threads
 
+COMMENTS_PER_PAGE = 10
 
+
+@cache_anonymous_page(Post, BlogCategory)
 def blog_list_view(request):
     """
     List all published blog posts
@@ -25,25 +37,24 @@ def blog_list_view(request):
     if category_slug:
         posts = posts.filter(category__slug=category_slug)
 
-    # Search
-    search_query = request.GET.get('q')
+    # The cards never render the search text, nor the content unless a
+    # search result needs a snippet from it
+    search_query = (request.GET.get('q') or '').strip()
+    posts = posts.defer(*search_fields()) if search_query else posts.defer('content', *search_fields())
+
+    # Search over the precomputed plain-text documents (see blog.search)
     if search_query:
-        posts = posts.filter(
-            Q(title__icontains=search_query) |
-            Q(title_en__icontains=search_query) |
-            Q(excerpt__icontains=search_query) |
-            Q(content__icontains=search_query)
-        )
+        posts = search_posts(posts, search_query).order_by('-search_rank', '-published_at')
 
     # Pagination
     paginator = Paginator(posts, 9)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
+    if search_query:
+        highlight_results(page_obj, search_query)
 
     # Get categories
-    categories = BlogCategory.objects.annotate(
-        post_count=Count('posts')
-    ).filter(post_count__gt=0)
+    categories = get_categories(with_posts=True)
 
     # Featured posts
     featured_posts = Post.objects.filter(
@@ -66,21 +77,25 @@ def blog_detail_view(request, slug):
     Detailed blog post view
     Template: blog/post_detail.html
     """
+    response = _blog_detail_page(request, slug)
+    # Buffered in the cache (see blog.counters); cached and 304 pages count too
+    if request.method == 'GET' and response.status_code in (200, 304):
+        record_view(slug)
+    return response
+
+
+@conditional_page(post_validators)
+@cache_anonymous_page(Post, BlogCategory, PostComment, RelatedPost)
+def _blog_detail_page(request, slug):
+    # The content is served from its save-time rendering (see blog.rendering)
     post = get_object_or_404(
-        Post.objects.select_related('author', 'category'),
+        Post.objects.select_related('author', 'category').defer('content', *search_fields()),
         slug=slug,
         status='published'
     )
 
-    # Increment views count
-    post.views_count += 1
-    post.save(update_fields=['views_count'])
-
-    # Get comments
-    comments = post.comments.filter(
-        is_approved=True,
-        parent=None
-    ).select_related('user').prefetch_related('replies')
+    # Get the first page of comment threads
+    comments = load_comment_threads(post.comments.all(), limit=COMMENTS_PER_PAGE, is_approved=True)
 
     # Handle comment form
     if request.method == 'POST' and request.user.is_authenticated:
@@ -101,14 +116,12 @@ def blog_detail_view(request, slug):
     else:
         form = PostCommentForm()
 
-    # Related posts
-    related_posts = Post.objects.filter(
-        status='published',
-        category=post.category
-    ).exclude(id=post.id).order_by('-published_at')[:3]
+    # Related posts, precomputed by compute_related_posts
+    related_posts = get_related_posts(post)
 
     context = {
         'post': post,
+        'content': get_rendered_content(post),
         'comments': comments,
         'form': form,
         'related_posts': related_posts,
@@ -116,12 +129,31 @@ def blog_detail_view(request, slug):
     return render(request, 'blog/post_detail.html', context)
 
 
+@cache_anonymous_page(Post, PostComment)
+def load_more_comments(request, slug):
+    """
+    HTMX endpoint for the next page of comment threads of a post
+    Template: blog/partials/comment_list.html
+    """
+    post = get_object_or_404(Post.objects.only('pk', 'slug'), slug=slug, status='published')
+    comments = load_comment_threads(
+        post.comments.all(), request.GET.get('cursor'), COMMENTS_PER_PAGE, is_approved=True
+    )
+
+    context = {
+        'post': post,
+        'comments': comments,
+    }
+    return render(request, 'blog/partials/comment_list.html', context)
+
+
+@cache_anonymous_page(Post, BlogCategory)
 def blog_category_view(request, slug):
     """
     View posts by category
     Template: blog/category.html
     """
-    category = get_object_or_404(BlogCategory, slug=slug)
+    category = get_category_or_404(slug)
     posts = Post.objects.filter(
         category=category,
         status='published'
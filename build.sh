@@ -12,6 +12,13 @@ python manage.py collectstatic --no-input
 # Apply database migrations
 python manage.py migrate
 
+# Render the stored HTML of posts that have none yet (blog/rendering.py)
+python manage.py render_posts --missing
+
+# Fill the related posts and courses (also refreshed hourly by a cron job)
+python manage.py compute_related_posts
+python manage.py compute_related_courses
+
 # Update translation fields
 python manage.py update_translation_fields --no-input || echo "Translation fields update skipped"
 
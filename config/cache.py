@@ -0,0 +1,186 @@
+"""
+Shared-cache helpers: per-model version counters, in-process snapshots
+and the anonymous full-page cache.
+
+Every model that pages or snapshots depend on has a version counter in
+the shared cache. Saving or deleting the model bumps it once the
+transaction commits (see the app signals modules), which invalidates
+everything built from it across all gunicorn workers. Bumping earlier
+would let a concurrent request cache the old rows under the new version.
+
+Views opt in to the page cache with ``@cache_anonymous_page(Model, ...)``.
+Anonymous GET/HEAD responses are stored under a key built from the path
+(which carries the i18n language prefix), the sorted query string, the
+HX-Request header and the current versions of the models the page depends
+on, so stale entries are never read again and expire on their own.
+
+The CSRF token rendered into a page is replaced by a placeholder before
+storing and swapped for the visitor's own token on every hit.
+"""
+import hashlib
+import re
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils.cache import patch_vary_headers
+
+VERSION_KEY = 'cache:version:{}'
+PAGE_KEY = 'pagecache:page:{}:{}'
+
+CSRF_PLACEHOLDER = b'__PAGE_CACHE_CSRF_TOKEN__'
+CSRF_INPUT_RE = re.compile(rb'name="csrfmiddlewaretoken" value="([A-Za-z0-9]+)"')
+
+CACHE_HEADER = 'X-Cache'
+
+
+def _label(model):
+    return model if isinstance(model, str) else model._meta.label_lower
+
+
+def bump_cache_version(model):
+    """Invalidate every cached page and snapshot that depends on ``model``"""
+    key = VERSION_KEY.format(_label(model))
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 2, None)
+    else:
+        # Backends without a native incr store the result with the default
+        # timeout; an expired version would make old entries current again
+        cache.touch(key, None)
+
+
+def incr_counter(key, delta=1, timeout=None):
+    """
+    Add ``delta`` to a counter in the shared cache, creating it if missing,
+    and give it ``timeout`` again. Returns the new value. Only atomic when
+    settings.CACHE_ATOMIC_INCR is set; callers that must not lose
+    increments check it first.
+    """
+    try:
+        value = cache.incr(key, delta)
+    except ValueError:
+        if cache.add(key, delta, timeout):
+            return delta
+        value = cache.incr(key, delta)
+    cache.touch(key, timeout)
+    return value
+
+
+def get_cache_versions(models):
+    """Return the current version of each model as a stable string"""
+    keys = [VERSION_KEY.format(_label(model)) for model in models]
+    versions = cache.get_many(keys)
+    return '.'.join(str(versions.get(key, 1)) for key in keys)
+
+
+def get_stored_cache_versions(models):
+    """
+    Like ``get_cache_versions`` for values kept outside the cache (e.g. in
+    the session), which outlive an evicted version key. A missing key is
+    recreated from the clock, so a stamp taken before the eviction never
+    matches again. Returns ``(versions, complete)``; ``complete`` is False
+    when a key had to be recreated and the stored value must be reloaded.
+    """
+    keys = [VERSION_KEY.format(_label(model)) for model in models]
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    for key in missing:
+        cache.add(key, time.time_ns(), None)
+    if missing:
+        versions.update(cache.get_many(missing))
+    return '.'.join(str(versions.get(key, 1)) for key in keys), not missing
+
+
+class ProcessSnapshot:
+    """
+    A value built by ``builder`` and kept in process memory until the shared
+    version of one of ``models`` changes. Each read costs one cache lookup
+    and no queries.
+    """
+
+    def __init__(self, builder, *models):
+        self.builder = builder
+        self.models = models
+        self._state = (None, None)
+
+    def get(self):
+        version = get_cache_versions(self.models)
+        cached_version, value = self._state
+        if cached_version != version:
+            value = self.builder()
+            self._state = (version, value)
+        return value
+
+    def clear(self):
+        """Rebuild on the next read, whatever the versions (e.g. between tests)"""
+        self._state = (None, None)
+
+
+def _is_cacheable_request(request):
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    if request.user.is_authenticated:
+        return False
+    # Pending flash messages are rendered into the page
+    return not len(get_messages(request))
+
+
+def _page_key(request, models):
+    query = '&'.join(sorted(request.GET.urlencode().split('&')))
+    htmx = request.headers.get('HX-Request', '')
+    raw = f'{request.path}?{query}|{htmx}'
+    digest = hashlib.md5(raw.encode()).hexdigest()
+    return PAGE_KEY.format(digest, get_cache_versions(models))
+
+
+def _strip_csrf_token(content):
+    match = CSRF_INPUT_RE.search(content)
+    if match:
+        content = content.replace(match.group(1), CSRF_PLACEHOLDER)
+    return content
+
+
+def cache_anonymous_page(*models, timeout=None):
+    """
+    Cache the full response of a view for anonymous visitors until one of
+    ``models`` changes or ``timeout`` (PAGE_CACHE_TIMEOUT) elapses.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if not _is_cacheable_request(request):
+                return view_func(request, *args, **kwargs)
+
+            key = _page_key(request, models)
+            cached = cache.get(key)
+            if cached is not None:
+                content, content_type = cached
+                content = content.replace(CSRF_PLACEHOLDER, get_token(request).encode())
+                response = HttpResponse(content, content_type=content_type)
+                response[CACHE_HEADER] = 'HIT'
+                patch_vary_headers(response, ['HX-Request'])
+                return response
+
+            response = view_func(request, *args, **kwargs)
+            if (
+                response.status_code == 200
+                and not response.streaming
+                and not response.cookies
+                and not response.has_header('Cache-Control')
+            ):
+                cache.set(
+                    key,
+                    (_strip_csrf_token(response.content), response['Content-Type']),
+                    timeout if timeout is not None else settings.PAGE_CACHE_TIMEOUT,
+                )
+            response[CACHE_HEADER] = 'MISS'
+            patch_vary_headers(response, ['HX-Request'])
+            return response
+        return wrapper
+    return decorator
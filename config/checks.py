@@ -0,0 +1,21 @@
+"""
+System checks for the deployment settings
+"""
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+
+@register(Tags.caches)
+def check_atomic_cache(app_configs, **kwargs):
+    """Warn when production runs without a cache that increments atomically"""
+    if settings.DEBUG or settings.CACHE_ATOMIC_INCR:
+        return []
+    return [Warning(
+        'REDIS_URL is not set, so the cache falls back to the database cache.',
+        hint=(
+            'Page, feed and version keys work, but the buffered post views and '
+            'playback heartbeats are written straight to the database on every '
+            'request. Set REDIS_URL for production.'
+        ),
+        id='config.W001',
+    )]
@@ -0,0 +1,116 @@
+"""
+Threaded comment loading shared by lesson comments (courses.Comment) and
+blog comments (blog.PostComment).
+
+A page of threads costs two queries whatever the number of replies: one
+for the top-level comments and one for the visible replies to them, both
+joined with their author. The tree is assembled in Python and each
+top-level comment gets its replies as the ``thread_replies`` list.
+
+Pages follow each other with a keyset cursor on (created_at, id) instead
+of OFFSET, so a deep "load more" costs the same as the first one and
+comments posted meanwhile never shift or repeat items. The number of
+threads left is a hint derived from a cached count, refreshed whenever a
+comment of that model is saved or deleted.
+
+Replies are one level deep, as the comment forms only reply to top-level
+comments.
+"""
+import base64
+import binascii
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from .cache import get_cache_versions
+
+COUNT_KEY = 'comments:count:{}:{}'
+COUNT_TIMEOUT = 60 * 10
+
+
+class CommentThreads(list):
+    """
+    Top-level comments of one page. ``next_cursor`` is set if another page
+    follows and ``remaining`` is the approximate number of threads after it.
+    """
+    next_cursor = None
+    remaining = 0
+
+    @property
+    def has_more(self):
+        return self.next_cursor is not None
+
+
+def encode_cursor(comment, shown):
+    raw = json.dumps([comment.created_at.isoformat(), comment.pk, shown], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return (created_at, pk, shown) for a cursor, or None if invalid"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, pk, shown = json.loads(raw)
+        created_at = parse_datetime(created_at)
+    except (binascii.Error, ValueError, TypeError):
+        return None
+    if created_at is None or not isinstance(pk, int) or not isinstance(shown, int):
+        return None
+    return created_at, pk, shown
+
+
+def _count_hint(roots):
+    """Number of threads in ``roots``, cached until the comment model changes"""
+    digest = hashlib.md5(str(roots.query).encode()).hexdigest()
+    key = COUNT_KEY.format(digest, get_cache_versions([roots.model]))
+    total = cache.get(key)
+    if total is None:
+        total = roots.count()
+        cache.set(key, total, COUNT_TIMEOUT)
+    return total
+
+
+def load_comment_threads(comments, cursor=None, limit=None, **visible):
+    """
+    Load the page of threads after ``cursor`` from ``comments`` (e.g.
+    ``lesson.comments.all()``), keeping only the comments and replies
+    matching the ``visible`` filters. Without ``limit`` every thread is
+    loaded.
+    """
+    roots = comments.filter(parent=None, **visible)
+    page = roots.select_related('user').order_by('created_at', 'pk')
+
+    shown = 0
+    position = decode_cursor(cursor)
+    if position is not None:
+        created_at, pk, shown = position
+        page = page.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=pk))
+
+    if limit is None:
+        threads = CommentThreads(page)
+    else:
+        # One extra row tells whether another page follows
+        rows = list(page[:limit + 1])
+        threads = CommentThreads(rows[:limit])
+        if len(rows) > limit:
+            shown += limit
+            threads.next_cursor = encode_cursor(threads[-1], shown)
+            threads.remaining = max(_count_hint(roots) - shown, 1)
+
+    by_id = {}
+    for comment in threads:
+        comment.thread_replies = []
+        by_id[comment.pk] = comment
+
+    if by_id:
+        replies = comments.model._default_manager.filter(
+            parent_id__in=by_id, **visible
+        ).select_related('user').order_by('created_at', 'pk')
+        for reply in replies:
+            by_id[reply.parent_id].thread_replies.append(reply)
+    return threads
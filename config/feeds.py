@@ -0,0 +1,74 @@
+"""
+Cached syndication feeds with conditional GET
+
+``CachedFeed`` is a django.contrib.syndication Feed whose rendered
+document is kept in the shared cache per feed, format and language until
+the version of one of its ``cache_models`` changes, i.e. until the next
+publish or edit. The cache key doubles as the ETag and the newest item date
+as Last-Modified, so a crawler polling an unchanged feed gets a 304 for
+the cost of two cache reads and no query; a changed feed is rendered once
+from a LIMIT query on the newest-first index of its model.
+
+The ``RssFeed``/``AtomFeed`` mixins pick the format; the subclasses set
+``feed_name`` so both formats of a feed share the item query.
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils import translation
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.feedgenerator import Atom1Feed, Rss201rev2Feed
+from django.utils.http import parse_http_date_safe, quote_etag
+
+from .cache import get_cache_versions
+
+FEED_KEY = 'feed:{}:{}:{}:{}'
+FEED_ITEMS = 20
+FEED_CACHE_TIMEOUT = 60 * 60
+# Shared caches and crawlers may reuse a feed this long without asking
+FEED_MAX_AGE = 60 * 5
+
+
+class CachedFeed(Feed):
+    feed_name = None
+    cache_models = ()
+
+    def _cache_key(self):
+        language = translation.get_language() or settings.LANGUAGE_CODE
+        versions = get_cache_versions(self.cache_models)
+        return FEED_KEY.format(self.feed_name, self.feed_type.__name__, language, versions)
+
+    def __call__(self, request, *args, **kwargs):
+        key = self._cache_key()
+        cached = cache.get(key)
+        if cached is None:
+            response = super().__call__(request, *args, **kwargs)
+            cached = (response.content, response['Content-Type'], response.get('Last-Modified'))
+            cache.set(key, cached, FEED_CACHE_TIMEOUT)
+        content, content_type, last_modified = cached
+
+        etag = quote_etag(hashlib.md5(key.encode()).hexdigest())
+        timestamp = parse_http_date_safe(last_modified) if last_modified else None
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = HttpResponse(content, content_type=content_type)
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = last_modified
+        patch_cache_control(response, public=True, max_age=FEED_MAX_AGE)
+        return response
+
+
+class RssFeed:
+    feed_type = Rss201rev2Feed
+
+
+class AtomFeed:
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj=None):
+        # Atom has no description element of its own
+        return self.description(obj)
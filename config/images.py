@@ -0,0 +1,167 @@
+"""
+Resized WebP/JPEG derivatives of uploaded images (course thumbnails, blog
+featured images, avatars).
+
+After an image field changes, its derivatives are generated with Pillow in
+a background thread once the transaction commits: one WebP and one JPEG
+per width in IMAGE_DERIVATIVE_WIDTHS, never wider than the original. Their
+names carry a hash of the source content, so identical uploads share files
+and every derivative URL can be cached forever.
+
+What was generated is recorded in the model's ``<field>_derivatives`` JSON
+field as ``{'source': name, 'digest': hash, 'widths': [...]}``. Templates
+read it through the ``srcset``/``picture`` tags (courses.templatetags.
+image_tags), which fall back to the original until the derivatives of the
+current file exist. Images uploaded before this, or lost to a restart
+mid-generation, are caught up by ``manage.py generate_image_derivatives``.
+"""
+import hashlib
+import logging
+import threading
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from .cache import bump_cache_version
+
+logger = logging.getLogger(__name__)
+
+# (model label, image field) pairs that get derivatives
+IMAGE_FIELDS = (
+    ('courses.Course', 'thumbnail'),
+    ('blog.Post', 'featured_image'),
+    ('users.CustomUser', 'avatar'),
+)
+
+DERIVATIVE_NAME = 'derivatives/{}/{}-{}w.{}'
+
+# format: (extension, MIME type, Pillow save options)
+FORMATS = {
+    'webp': ('webp', 'image/webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('jpg', 'image/jpeg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+def manifest_field(field_name):
+    return f'{field_name}_derivatives'
+
+
+def derivative_name(digest, width, fmt):
+    return DERIVATIVE_NAME.format(digest[:2], digest, width, FORMATS[fmt][0])
+
+
+def get_manifest(file):
+    """Return the derivatives manifest of a FieldFile if it matches its current file"""
+    if not file:
+        return None
+    manifest = getattr(file.instance, manifest_field(file.field.name), None)
+    if not manifest or manifest.get('source') != file.name:
+        return None
+    return manifest
+
+
+def _flatten(image):
+    """RGB copy of ``image`` with any transparency laid over white, for JPEG"""
+    if image.mode in ('RGB', 'L'):
+        return image
+    rgba = image.convert('RGBA')
+    background = Image.new('RGB', rgba.size, (255, 255, 255))
+    background.paste(rgba, mask=rgba.getchannel('A'))
+    return background
+
+
+def generate_derivatives(file):
+    """
+    Write the derivatives of a FieldFile to the default storage and return
+    its manifest, or None if the file is missing or not a readable image.
+    """
+    try:
+        with file.open('rb') as source:
+            data = source.read()
+        image = ImageOps.exif_transpose(Image.open(BytesIO(data)))
+        image.load()
+    except (OSError, ValueError, Image.DecompressionBombError) as exc:
+        logger.warning('Cannot generate derivatives of %s: %s', file.name, exc)
+        return None
+
+    digest = hashlib.sha256(data).hexdigest()[:20]
+    if image.mode not in ('RGB', 'RGBA', 'L'):
+        image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+    widths = sorted({min(width, image.width) for width in settings.IMAGE_DERIVATIVE_WIDTHS})
+
+    for width in widths:
+        height = max(round(image.height * width / image.width), 1)
+        resized = image.resize((width, height), Image.Resampling.LANCZOS)
+        for fmt, (_ext, _mime, options) in FORMATS.items():
+            name = derivative_name(digest, width, fmt)
+            if default_storage.exists(name):
+                continue
+            buffer = BytesIO()
+            (_flatten(resized) if fmt == 'jpeg' else resized).save(buffer, fmt.upper(), **options)
+            default_storage.save(name, ContentFile(buffer.getvalue()))
+
+    return {'source': file.name, 'digest': digest, 'widths': widths}
+
+
+def build_derivatives(model, pk, field_name):
+    """
+    Generate the derivatives of one row's image and record the manifest,
+    unless the image changed meanwhile. Returns True if it was recorded.
+    """
+    instance = model._default_manager.filter(pk=pk).first()
+    file = getattr(instance, field_name, None)
+    if not file:
+        return False
+    manifest = generate_derivatives(file)
+    if manifest is None:
+        return False
+
+    updated = model._default_manager.filter(pk=pk, **{field_name: manifest['source']}).update(**{
+        manifest_field(field_name): manifest,
+        'updated_at': timezone.now(),
+    })
+    if updated:
+        # Cached pages still render the original
+        bump_cache_version(model)
+    return bool(updated)
+
+
+def _build_in_background(model, pk, field_name):
+    def run():
+        try:
+            build_derivatives(model, pk, field_name)
+        except Exception:
+            logger.exception('Generating derivatives of %s %s failed', model._meta.label, pk)
+        finally:
+            # The thread's own connection
+            connection.close()
+
+    if settings.IMAGE_DERIVATIVES_ASYNC:
+        threading.Thread(target=run, daemon=True).start()
+    else:
+        build_derivatives(model, pk, field_name)
+
+
+def schedule_derivatives(instance, field_name, update_fields=None):
+    """Generate the derivatives of ``instance``'s image after commit if it changed"""
+    if update_fields is not None and field_name not in update_fields:
+        return
+    if {field_name, manifest_field(field_name)} & instance.get_deferred_fields():
+        return
+    file = getattr(instance, field_name)
+    if not file or get_manifest(file) is not None:
+        return
+    model, pk = type(instance), instance.pk
+    transaction.on_commit(lambda: _build_in_background(model, pk, field_name))
+
+
+def iter_image_fields():
+    """Yield (model, field_name) for every image that gets derivatives"""
+    for label, field_name in IMAGE_FIELDS:
+        yield apps.get_model(label), field_name
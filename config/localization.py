@@ -0,0 +1,16 @@
+"""
+Helpers for modeltranslation fields reached through relations
+"""
+from django.conf import settings
+from modeltranslation.utils import build_localized_fieldname
+
+
+def localized_related_fields(prefix, field):
+    """
+    The per-language columns of ``prefix__field`` for ``only()``, which
+    modeltranslation only expands for the queried model's own fields
+    """
+    return tuple(
+        build_localized_fieldname(f'{prefix}__{field}', code)
+        for code in settings.MODELTRANSLATION_LANGUAGES
+    )
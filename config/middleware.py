@@ -1,9 +1,21 @@
 from django.conf import settings
+from django.contrib.auth.middleware import get_user
 from django.core.exceptions import PermissionDenied
 from django.http import HttpRequest
 from django.utils.deprecation import MiddlewareMixin
+from django.utils.functional import SimpleLazyObject
 from django_ratelimit.core import get_usage
 
+from users.roles import bind_roles_session
+
+
+class UserRolesMiddleware(MiddlewareMixin):
+    """Keep the user's roles in the session between requests (see users.roles)."""
+
+    def process_request(self, request: HttpRequest):
+        # Still lazy: requests that never look at the user load nothing
+        request.user = SimpleLazyObject(lambda: bind_roles_session(get_user(request), request.session))
+
 
 class LoginRateLimitMiddleware(MiddlewareMixin):
     """Rate limit authentication attempts to reduce automated abuse."""
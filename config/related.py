@@ -0,0 +1,168 @@
+"""
+Related items (posts, courses) computed offline
+
+Items are compared by the TF-IDF cosine similarity of their normalized
+title and summary text, plus CATEGORY_BONUS when they share a category.
+Each item is a sparse, L2-normalized term vector held in a dict, and an
+inverted index (term -> postings) lets scoring one item visit only the items
+sharing a term with it; a full rebuild is the sparse product of the
+document-term matrix with its transpose, one row at a time. The best
+RELATED_LIMIT items of each item are stored in a relation table (blog
+RelatedPost, courses RelatedCourse) that the detail pages read with a
+single indexed lookup.
+
+Runs are incremental by default: only the items changed since the previous
+run, and the items whose stored lists those enter or leave, are
+recomputed. Untouched lists keep the term weights (IDF) of the run that
+stored them until the next full rebuild.
+"""
+import heapq
+import math
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from config.cache import bump_cache_version
+
+RELATED_LIMIT = 6
+CATEGORY_BONUS = 0.1
+# Title terms count this many times in the term frequencies
+TITLE_WEIGHT = 2
+MIN_TOKEN_LENGTH = 2
+
+
+def document_tokens(title, text):
+    """Terms of an item from its normalized title and text"""
+    tokens = title.split() * TITLE_WEIGHT + text.split()
+    return [token for token in tokens if len(token) >= MIN_TOKEN_LENGTH]
+
+
+class RelatedIndex:
+    """
+    TF-IDF vectors and postings of a corpus. ``documents`` maps item pks to
+    their terms and ``categories`` maps item pks to a category pk or None.
+    """
+
+    def __init__(self, documents, categories):
+        total = len(documents)
+        frequencies = Counter()
+        for tokens in documents.values():
+            frequencies.update(set(tokens))
+        idf = {term: math.log((1 + total) / (1 + count)) + 1 for term, count in frequencies.items()}
+
+        self.vectors = {}
+        self.postings = defaultdict(list)
+        for pk, tokens in documents.items():
+            weights = {
+                term: (1 + math.log(count)) * idf[term]
+                for term, count in Counter(tokens).items()
+            }
+            norm = math.sqrt(sum(weight * weight for weight in weights.values())) or 1.0
+            vector = {term: weight / norm for term, weight in weights.items()}
+            self.vectors[pk] = vector
+            for term, weight in vector.items():
+                self.postings[term].append((pk, weight))
+
+        self.categories = categories
+        self.members = defaultdict(list)
+        for pk in documents:
+            if categories.get(pk) is not None:
+                self.members[categories[pk]].append(pk)
+
+    def scores(self, pk):
+        """{other pk: score} for every item related to ``pk`` at all"""
+        scores = defaultdict(float)
+        for term, weight in self.vectors.get(pk, {}).items():
+            for other, other_weight in self.postings[term]:
+                scores[other] += weight * other_weight
+        category = self.categories.get(pk)
+        if category is not None:
+            for other in self.members[category]:
+                scores[other] += CATEGORY_BONUS
+        scores.pop(pk, None)
+        return scores
+
+    def top(self, pk, limit=RELATED_LIMIT):
+        """The ``limit`` best (other pk, score) pairs, best first"""
+        # Ties go to the newer (higher pk) item so runs are reproducible
+        return heapq.nlargest(limit, self.scores(pk).items(), key=lambda item: (item[1], item[0]))
+
+
+def _affected_items(relation_model, item_field, index, changed, limit):
+    stored = defaultdict(list)
+    rows = relation_model.objects.values_list(f'{item_field}_id', 'related_id', 'score')
+    for pk, related, score in rows.iterator():
+        stored[pk].append((related, score))
+
+    affected = set(changed)
+    # Lists holding a changed item may lose it or see its score move
+    for pk, entries in stored.items():
+        if any(related in changed for related, _score in entries):
+            affected.add(pk)
+    # Lists a changed item now belongs to
+    for pk in changed:
+        if pk not in index.vectors:
+            continue
+        for other, score in index.scores(pk).items():
+            entries = stored.get(other, ())
+            if len(entries) < limit or score > min(entry_score for _related, entry_score in entries):
+                affected.add(other)
+    return affected
+
+
+def changed_since_last_run(relation_model, item_field, queryset, documents):
+    """
+    Pks needing recomputation: items updated since the previous run, plus
+    stored items and neighbours that are no longer part of the corpus.
+    Returns None when nothing was stored yet, i.e. a full rebuild is due.
+    """
+    last_run = relation_model.objects.aggregate(last_run=Max('computed_at'))['last_run']
+    if last_run is None:
+        return None
+    changed = set(queryset.filter(updated_at__gte=last_run).values_list('pk', flat=True))
+    for pair in relation_model.objects.values_list(f'{item_field}_id', 'related_id').distinct():
+        changed.update(pk for pk in pair if pk not in documents)
+    return changed
+
+
+def recompute_related(relation_model, item_field, documents, categories, changed=None, limit=RELATED_LIMIT):
+    """
+    Store the top ``limit`` related items of the corpus ``documents``
+    ({pk: terms}) in ``relation_model``, whose ``item_field`` foreign key
+    points at the item and ``related`` at its neighbour. With ``changed``
+    (a set of pks) only the affected lists are rewritten, otherwise all of
+    them. Returns the number of lists recomputed.
+    """
+    if changed is not None and not changed:
+        return 0
+    started = timezone.now()
+    index = RelatedIndex(documents, categories)
+    if changed is None:
+        affected = None
+        items = list(documents)
+    else:
+        affected = _affected_items(relation_model, item_field, index, changed, limit)
+        items = [pk for pk in affected if pk in documents]
+
+    rows = [
+        relation_model(**{
+            f'{item_field}_id': pk,
+            'related_id': related,
+            'score': score,
+            'rank': rank,
+            'computed_at': started,
+        })
+        for pk in items
+        for rank, (related, score) in enumerate(index.top(pk, limit), start=1)
+    ]
+    with transaction.atomic():
+        stale = relation_model.objects.all()
+        if affected is not None:
+            stale = stale.filter(**{f'{item_field}_id__in': affected})
+        stale.delete()
+        relation_model.objects.bulk_create(rows, batch_size=1000)
+    # Bulk operations send no signals; cached detail pages show the lists
+    transaction.on_commit(lambda: bump_cache_version(relation_model))
+    return len(items) if affected is None else len(affected)
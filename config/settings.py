@@ -56,6 +56,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'config.middleware.UserRolesMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'allauth.account.middleware.AccountMiddleware',
@@ -98,6 +99,31 @@ DATABASES = {
     )
 }
 
+# Cache: Redis when REDIS_URL is set, otherwise the database cache table
+# created by build.sh. Either way it is shared by every gunicorn worker.
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'django_cache',
+        }
+    }
+# Redis increments atomically and keeps the expiry of what it increments;
+# the database cache does neither (incr is a get plus a set), so the
+# write-behind buffers (blog/counters.py, courses/playback.py) write
+# straight to the database
+CACHE_ATOMIC_INCR = bool(REDIS_URL)
+
+# Anonymous full-page cache (config/cache.py)
+PAGE_CACHE_TIMEOUT = config('PAGE_CACHE_TIMEOUT', default=300, cast=int)
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -155,6 +181,17 @@ STORAGES = {
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Resized WebP/JPEG copies of uploaded images (config/images.py)
+IMAGE_DERIVATIVE_WIDTHS = (160, 320, 640, 1280)
+IMAGE_DERIVATIVES_ASYNC = config('IMAGE_DERIVATIVES_ASYNC', default=True, cast=bool)
+
+# Protected lesson videos (courses/streaming.py): '' streams them from Django,
+# 'x-accel-redirect' (nginx) or 'x-sendfile' hands them to the web server
+MEDIA_OFFLOAD = config('MEDIA_OFFLOAD', default='')
+MEDIA_OFFLOAD_PREFIX = config('MEDIA_OFFLOAD_PREFIX', default='/protected-media/')
+# Lifetime of the signed lesson video URLs (courses/signed_media.py)
+SIGNED_MEDIA_TTL = config('SIGNED_MEDIA_TTL', default=3 * 60 * 60, cast=int)
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -238,6 +275,9 @@ TINYMCE_DEFAULT_CONFIG = {
     'language': 'ar',
 }
 
+# Hosts whose iframes survive the blog post sanitizer (blog/rendering.py)
+BLOG_EMBED_HOSTS = ('www.youtube.com', 'www.youtube-nocookie.com', 'player.vimeo.com')
+
 # Security settings for production
 if not DEBUG:
     SECURE_SSL_REDIRECT = True
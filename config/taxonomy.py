@@ -0,0 +1,52 @@
+"""
+In-process category snapshots for the catalog and the blog
+
+The category list with published item counts lives in process memory and
+is rebuilt only when the shared version of the item or category model
+changes, so rendering filters and category lookups normally costs no
+queries. The snapshot holds model instances, so modeltranslation still
+resolves ``category.name`` in the language of each request.
+"""
+from django.db.models import Count
+from django.http import Http404
+
+from .cache import ProcessSnapshot
+
+
+class CategorySnapshot:
+    """
+    All ``category_model`` rows annotated with ``count_name``, the number of
+    their ``relation`` items matching ``published`` (a Q on the relation)
+    """
+
+    def __init__(self, category_model, item_model, relation, published, count_name):
+        self.category_model = category_model
+        self.relation = relation
+        self.published = published
+        self.count_name = count_name
+        self._snapshot = ProcessSnapshot(self._build, item_model, category_model)
+
+    def _build(self):
+        categories = list(self.category_model.objects.annotate(**{
+            self.count_name: Count(self.relation, filter=self.published),
+        }))
+        return {
+            'list': categories,
+            'by_slug': {category.slug: category for category in categories},
+        }
+
+    def clear(self):
+        self._snapshot.clear()
+
+    def list(self, non_empty=False):
+        """The categories ordered by name, optionally only those with items"""
+        categories = self._snapshot.get()['list']
+        if non_empty:
+            return [category for category in categories if getattr(category, self.count_name)]
+        return categories
+
+    def get_or_404(self, slug):
+        try:
+            return self._snapshot.get()['by_slug'][slug]
+        except KeyError:
+            raise Http404('No category matches the given slug.')
@@ -0,0 +1,53 @@
+"""
+Enrollment access checks
+
+The IDs of the courses a user is actively enrolled in are loaded with one
+query, kept in the shared cache and memoized on the request, so every
+access check after the first costs no query at all. The cache key carries
+a per-user version that is bumped (after commit) whenever one of the
+user's enrollments changes, see courses.signals. A reader that loaded the
+IDs before the change stores them under the old version, so a late write
+can never hide the new enrollment.
+"""
+from django.core.cache import cache
+from django.db import transaction
+
+from config.cache import bump_cache_version, get_cache_versions
+
+ENROLLMENTS_KEY = 'enrollments:user:{}:{}'
+ENROLLMENTS_TIMEOUT = 60 * 60
+
+
+def _user_label(user_id):
+    return f'enrollments.user.{user_id}'
+
+
+def get_enrolled_course_ids(request):
+    """Return the frozenset of course IDs the request user is enrolled in"""
+    user = request.user
+    if not user.is_authenticated:
+        return frozenset()
+
+    course_ids = getattr(request, '_enrolled_course_ids', None)
+    if course_ids is None:
+        key = ENROLLMENTS_KEY.format(user.pk, get_cache_versions([_user_label(user.pk)]))
+        course_ids = cache.get(key)
+        if course_ids is None:
+            from .models import Enrollment
+            course_ids = frozenset(Enrollment.objects.filter(
+                user=user, is_active=True
+            ).values_list('course_id', flat=True))
+            cache.set(key, course_ids, ENROLLMENTS_TIMEOUT)
+        request._enrolled_course_ids = course_ids
+    return course_ids
+
+
+def is_enrolled(request, course):
+    """Whether the request user has an active enrollment in ``course``"""
+    course_id = getattr(course, 'pk', course)
+    return course_id in get_enrolled_course_ids(request)
+
+
+def invalidate_enrollments(user_id):
+    """Forget the cached course IDs of a user once the transaction commits"""
+    transaction.on_commit(lambda: bump_cache_version(_user_label(user_id)))
@@ -70,7 +70,7 @@ class EnrollmentAdmin(admin.ModelAdmin):
     list_display = ['user', 'course', 'enrolled_at', 'progress', 'is_active', 'completed_at']
     list_filter = ['is_active', 'enrolled_at', 'course']
     search_fields = ['user__username', 'user__email', 'course__title']
-    readonly_fields = ['enrolled_at']
+    readonly_fields = ['enrolled_at', 'progress']
 
 
 @admin.register(Comment)
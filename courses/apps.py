@@ -4,4 +4,8 @@ from django.apps import AppConfig
 class CoursesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'courses'
-    verbose_name = 'الدورات'
\ No newline at end of file
+    verbose_name = 'الدورات'
+
+    def ready(self):
+        import config.checks
+        import courses.signals
@@ -0,0 +1,171 @@
+"""
+Catalog filtering and keyset (cursor) pagination
+
+Pages are fetched with ``WHERE (sort_key, id) > cursor ORDER BY sort_key,
+id LIMIT per_page + 1`` instead of OFFSET, so every page costs the same
+single query however deep the visitor scrolls, and no COUNT is issued.
+"""
+import base64
+import binascii
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db.models import CharField, F, Q, Value
+from django.db.models.functions import Coalesce
+from django.urls import reverse
+from django.utils import translation
+from django.utils.dateparse import parse_datetime
+
+from .models import Course
+
+COURSES_PER_PAGE = 12
+
+SORT_OPTIONS = ['-created_at', 'price', '-price', 'title']
+
+# Search results without an explicit sort are ordered by relevance
+RELEVANCE = 'relevance'
+
+# sort option -> (key expression/field, descending)
+SORT_KEYS = {
+    '-created_at': ('created_at', True),
+    'price': ('price', False),
+    '-price': ('price', True),
+    'title': ('sort_title', False),
+    RELEVANCE: ('search_rank', True),
+}
+
+
+class CoursePage:
+    """One page of courses plus the cursor of the next page, if any"""
+
+    def __init__(self, object_list, next_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+def encode_cursor(sort_by, value, pk):
+    raw = json.dumps([sort_by, value, pk], separators=(',', ':'), default=str)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, sort_by):
+    """Return (value, pk) for a cursor of this sort order, or None if invalid"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        cursor_sort, value, pk = json.loads(raw)
+    except (binascii.Error, ValueError, TypeError):
+        return None
+    if cursor_sort != sort_by or not isinstance(pk, int):
+        return None
+
+    field = SORT_KEYS[sort_by][0]
+    try:
+        if field == 'created_at':
+            value = parse_datetime(value)
+        elif field in ('price', 'search_rank'):
+            value = Decimal(value)
+            if not value.is_finite():
+                return None
+        elif not isinstance(value, str):
+            return None
+    except (InvalidOperation, TypeError, ValueError):
+        return None
+    return (value, pk) if value is not None else None
+
+
+def _localized_title():
+    """Title in the active language, falling back like modeltranslation does"""
+    from modeltranslation.utils import resolution_order
+
+    language = (translation.get_language() or settings.LANGUAGE_CODE).split('-')[0]
+    return Coalesce(
+        *[F(f'title_{code}') for code in resolution_order(language)],
+        Value(''),
+        output_field=CharField(),
+    )
+
+
+def filter_catalog(queryset, params):
+    """
+    Apply the catalog filters from a QueryDict and return
+    (queryset, sort_by, filters) where filters feeds the template.
+    """
+    category_slug = params.get('category')
+    if category_slug:
+        queryset = queryset.filter(category__slug=category_slug)
+
+    difficulty = params.get('difficulty')
+    if difficulty:
+        queryset = queryset.filter(difficulty=difficulty)
+
+    search_query = params.get('q')
+    if search_query:
+        queryset = queryset.search(search_query)
+
+    sort_by = params.get('sort')
+    if sort_by not in SORT_OPTIONS:
+        sort_by = RELEVANCE if search_query else '-created_at'
+
+    filters = {
+        'selected_category': category_slug,
+        'selected_difficulty': difficulty,
+        'search_query': search_query,
+        'selected_sort': sort_by,
+    }
+    return queryset, sort_by, filters
+
+
+def paginate_courses(queryset, sort_by, cursor=None, per_page=COURSES_PER_PAGE):
+    """Return the CoursePage that follows ``cursor`` for the given sort order"""
+    field, descending = SORT_KEYS[sort_by]
+    if field == 'sort_title':
+        queryset = queryset.annotate(sort_title=_localized_title())
+
+    position = decode_cursor(cursor, sort_by)
+    if position is not None:
+        value, pk = position
+        after = 'lt' if descending else 'gt'
+        queryset = queryset.filter(
+            Q(**{f'{field}__{after}': value}) | Q(**{field: value, f'pk__{after}': pk})
+        )
+
+    prefix = '-' if descending else ''
+    rows = list(queryset.order_by(f'{prefix}{field}', f'{prefix}pk')[:per_page + 1])
+
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        last = rows[-1]
+        next_cursor = encode_cursor(sort_by, getattr(last, field), last.pk)
+    return CoursePage(rows, next_cursor)
+
+
+def catalog_context(request, per_page=COURSES_PER_PAGE):
+    """
+    Filter, sort and paginate published courses for a catalog request.
+    Returns a template context with the page of courses, the filters and
+    the URL of the next page for infinite scroll.
+    """
+    courses = Course.objects.published().with_card_stats().for_language()
+    courses, sort_by, context = filter_catalog(courses, request.GET)
+    page = paginate_courses(courses, sort_by, request.GET.get('cursor'), per_page)
+
+    next_page_url = None
+    if page.has_next:
+        params = request.GET.copy()
+        params['cursor'] = page.next_cursor
+        next_page_url = f"{reverse('courses:page_htmx')}?{params.urlencode()}"
+
+    context.update({
+        'courses': page.object_list,
+        'page': page,
+        'next_page_url': next_page_url,
+    })
+    return context
@@ -0,0 +1,67 @@
+"""
+Validators for conditional GETs of course pages (see config.conditional)
+
+Each one costs at most one small query, or only cache reads for the course
+detail page, whose shell already carries its version and modification time.
+The stored counters (lessons, students, reviews) are part of the ETag as
+they change on deletions, which no ``updated_at`` reflects.
+"""
+from django.db.models import OuterRef
+
+from config.cache import get_cache_versions
+from config.conditional import latest_change, newest, row_count
+from .access import is_enrolled
+from .detail import get_course_shell
+from .models import Category, Comment, Course, Lesson
+from .playback import get_resume_position
+from .signed_media import media_expiry
+
+
+def course_detail_validators(request, slug):
+    _shell, course = get_course_shell(request, slug)
+    parts = (course.get('version'), is_enrolled(request, course['pk']))
+    return parts, course.get('last_modified')
+
+
+def lesson_content_validators(request, course_slug, lesson_id):
+    comments = Comment.objects.filter(lesson=OuterRef('pk'))
+    lesson = Lesson.objects.filter(
+        pk=lesson_id,
+        course__slug=course_slug,
+        course__is_published=True,
+    ).annotate(
+        lessons_changed=latest_change(Lesson.objects.filter(course=OuterRef('course'))),
+        comments_changed=latest_change(comments),
+        comments_total=row_count(comments, 'lesson'),
+    ).values(
+        'course_id', 'is_preview', 'updated_at', 'course__updated_at', 'course__lessons_count',
+        'lessons_changed', 'comments_changed', 'comments_total',
+    ).first()
+    if lesson is None:
+        return None
+
+    enrolled = is_enrolled(request, lesson['course_id'])
+    if not (lesson['is_preview'] or enrolled):
+        # Leave the refusal to the view
+        return None
+
+    resume_at = get_resume_position(request.user.pk, lesson['course_id'], lesson_id) if enrolled else 0
+    # The page embeds a signed video URL that must not outlive its expiry
+    parts = (lesson['course__lessons_count'], lesson['comments_total'], enrolled, resume_at, media_expiry())
+    return parts, newest(
+        lesson['updated_at'],
+        lesson['course__updated_at'],
+        lesson['lessons_changed'],
+        lesson['comments_changed'],
+    )
+
+
+def course_preview_validators(request, course_slug):
+    course = Course.objects.filter(slug=course_slug, is_published=True).annotate(
+        lessons_changed=latest_change(Lesson.objects.filter(course=OuterRef('pk'), is_preview=True)),
+    ).values('updated_at', 'lessons_count', 'students_count', 'lessons_changed').first()
+    if course is None:
+        return None
+
+    parts = (course['lessons_count'], course['students_count'], get_cache_versions([Category]))
+    return parts, newest(course['updated_at'], course['lessons_changed'])
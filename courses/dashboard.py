@@ -0,0 +1,102 @@
+"""
+Learner dashboard data
+
+``get_dashboard(user)`` returns the user's active enrollments with their
+course (category, instructor), progress, completion date and next
+unfinished lesson in two queries: the enrollments with every per-row value
+computed by subqueries, then the next lessons themselves. The result is
+cached per user and language until one of the user's enrollments or their
+progress changes, or a course, category or lesson is edited.
+
+Buffered playback heartbeats (courses.playback) are newer than the cached
+rows, so callers overlay them with ``get_playback_states``.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max, OuterRef, Subquery
+from django.utils import translation
+from modeltranslation.utils import build_localized_fieldname
+
+from config.cache import bump_cache_version, get_cache_versions
+
+DASHBOARD_KEY = 'dashboard:user:{}:{}:{}'
+DASHBOARD_TIMEOUT = 60 * 60
+
+# Columns the dashboard renders; the instructor's other fields stay out of the cache
+DASHBOARD_FIELDS = (
+    'id', 'course_id', 'progress', 'enrolled_at',
+    'last_lesson_id', 'last_accessed_at', 'watched_seconds',
+    'course__id', 'course__slug', 'course__thumbnail',
+    'course__thumbnail_derivatives', 'course__lessons_count',
+    'course__category__id', 'course__category__slug',
+    'course__instructor__id', 'course__instructor__username',
+    'course__instructor__first_name', 'course__instructor__last_name',
+)
+# modeltranslation only expands the queried model's own fields in only()
+TRANSLATED_FIELDS = ('course__title', 'course__category__name')
+
+
+def _dashboard_fields():
+    localized = [
+        build_localized_fieldname(lookup, code)
+        for lookup in TRANSLATED_FIELDS
+        for code in settings.MODELTRANSLATION_LANGUAGES
+    ]
+    return DASHBOARD_FIELDS + TRANSLATED_FIELDS + tuple(localized)
+
+
+def _user_label(user_id):
+    return f'dashboard.user.{user_id}'
+
+
+def invalidate_dashboard(user_id):
+    """Drop the cached dashboard of a user once the current transaction commits"""
+    transaction.on_commit(lambda: bump_cache_version(_user_label(user_id)))
+
+
+def _load_dashboard(user):
+    from .models import Enrollment, Lesson, LessonCompletion
+
+    completions = LessonCompletion.objects.filter(enrollment=OuterRef('pk'))
+    next_lesson = Lesson.objects.filter(
+        course=OuterRef('course'),
+        is_published=True,
+    ).exclude(
+        pk__in=LessonCompletion.objects.filter(enrollment=OuterRef(OuterRef('pk'))).values('lesson')
+    ).order_by('order', 'created_at').values('pk')[:1]
+
+    enrollments = list(Enrollment.objects.filter(
+        user=user,
+        is_active=True,
+    ).select_related(
+        'course__category', 'course__instructor'
+    ).only(*_dashboard_fields()).annotate(
+        last_completed_at=Subquery(completions.order_by().values('enrollment').annotate(
+            latest=Max('completed_at')
+        ).values('latest')),
+        next_lesson_id=Subquery(next_lesson),
+    ).order_by('-enrolled_at'))
+
+    next_lessons = Lesson.objects.only('id', 'course_id', 'title', 'duration_minutes').in_bulk(
+        {enrollment.next_lesson_id for enrollment in enrollments if enrollment.next_lesson_id}
+    )
+    for enrollment in enrollments:
+        enrollment.next_lesson = next_lessons.get(enrollment.next_lesson_id)
+        enrollment.completed_at = enrollment.last_completed_at if enrollment.progress >= 100 else None
+    return enrollments
+
+
+def get_dashboard(user):
+    """Return the user's active enrollments, newest first, for the dashboard"""
+    from .models import Category, Course, Lesson
+
+    language = translation.get_language() or settings.LANGUAGE_CODE
+    versions = get_cache_versions([_user_label(user.pk), Course, Category, Lesson])
+    key = DASHBOARD_KEY.format(user.pk, language, versions)
+
+    enrollments = cache.get(key)
+    if enrollments is None:
+        enrollments = _load_dashboard(user)
+        cache.set(key, enrollments, DASHBOARD_TIMEOUT)
+    return enrollments
@@ -0,0 +1,90 @@
+"""
+Course detail page: a shared shell plus personalized fragments
+
+Everything on the page that is the same for every visitor (course,
+lessons, reviews, sidebar info) is rendered once per course and language
+and kept in the shared cache until one of SHELL_MODELS changes. The
+per-user parts (buy/continue buttons, review button) are small fragments
+rendered on each request into the shell's slots, and the lesson locks are
+toggled by a class on the page wrapper. A logged-in view therefore costs
+a few cache reads and at most one small query.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max
+from django.shortcuts import get_object_or_404
+from django.template.loader import render_to_string
+from django.utils import translation
+
+from config.cache import get_cache_versions
+from config.conditional import newest
+from .models import Category, Course, Lesson, RelatedCourse, Review
+from .related import get_related_courses
+from .reviews import get_reviews_page
+from .stats import STATS_LABEL
+
+SHELL_MODELS = (Course, Category, Lesson, Review, RelatedCourse, STATS_LABEL)
+SHELL_KEY = 'course:shell:{}:{}:{}'
+
+ACTIONS_SLOT = '<!--course-actions-->'
+REVIEW_ACTIONS_SLOT = '<!--review-actions-->'
+
+
+def get_course_shell(request, slug):
+    """
+    Return (html, course_info) for the shared part of a course page,
+    rendering it on a cache miss. ``course_info`` holds the few course
+    attributes the personalized fragments need, plus the shell's version
+    and last modification time for conditional requests.
+    """
+    language = translation.get_language() or settings.LANGUAGE_CODE
+    digest = hashlib.md5(slug.encode()).hexdigest()
+    versions = get_cache_versions(SHELL_MODELS)
+    key = SHELL_KEY.format(digest, language, versions)
+
+    # The conditional GET check and the view both ask for the shell
+    memo = getattr(request, '_course_shell', None)
+    if memo is not None and memo[0] == key:
+        return memo[1]
+
+    shell = cache.get(key)
+    if shell is None:
+        course = get_object_or_404(
+            Course.objects.select_related('category', 'instructor'),
+            slug=slug,
+            is_published=True
+        )
+        lessons = list(course.lessons.all().order_by('order', 'created_at'))
+        context = {
+            'course': course,
+            'lessons': lessons,
+            'preview_lessons': [lesson for lesson in lessons if lesson.is_preview],
+            'reviews': get_reviews_page(course),
+            'related_courses': get_related_courses(course),
+        }
+        html = render_to_string('courses/partials/course_shell.html', context, request=request)
+        course_info = {
+            'pk': course.pk,
+            'slug': course.slug,
+            'title': course.title,
+            'first_lesson_id': lessons[0].pk if lessons else None,
+            'version': versions,
+            'last_modified': newest(
+                course.updated_at,
+                *(lesson.updated_at for lesson in lessons),
+                course.reviews.aggregate(latest=Max('updated_at'))['latest'],
+            ),
+        }
+        shell = (html, course_info)
+        cache.set(key, shell, settings.PAGE_CACHE_TIMEOUT)
+    request._course_shell = (key, shell)
+    return shell
+
+
+def fill_slots(html, fragments):
+    """Put the rendered per-user fragments ({slot: html}) into the shell"""
+    for slot, fragment in fragments.items():
+        html = html.replace(slot, fragment)
+    return html
@@ -0,0 +1,70 @@
+"""
+RSS and Atom feeds of the newest published courses, per language
+(see config.feeds)
+
+The feeds are keyed on FEED_LABEL, which courses.signals bumps only when a
+published course is saved, (un)published or deleted, so drafts and
+counter updates never change their ETag.
+"""
+from django.urls import reverse
+from django.utils.text import Truncator
+from django.utils.translation import gettext as _
+
+from config.feeds import FEED_ITEMS, AtomFeed, CachedFeed, RssFeed
+from config.localization import localized_related_fields
+from .models import Category, Course
+
+FEED_FIELDS = (
+    'id', 'slug', 'title', 'description', 'published_at', 'updated_at',
+    'instructor__id', 'instructor__username', 'instructor__first_name', 'instructor__last_name',
+    'category__id', 'category__name', *localized_related_fields('category', 'name'),
+)
+DESCRIPTION_WORDS = 60
+
+FEED_LABEL = 'courses.course.feed'
+
+
+class CourseFeed(CachedFeed):
+    feed_name = 'courses'
+    cache_models = (FEED_LABEL, Category)
+
+    def title(self):
+        return _('أحدث دورات الأكاديمية')
+
+    def link(self):
+        return reverse('courses:list')
+
+    def description(self, obj=None):
+        return _('الدورات المنشورة حديثا في الأكاديمية')
+
+    def items(self):
+        # Served by course_pub_published_idx
+        return Course.objects.filter(
+            is_published=True,
+        ).select_related('instructor', 'category').only(*FEED_FIELDS).order_by('-published_at', '-pk')[:FEED_ITEMS]
+
+    def item_title(self, item):
+        return item.title
+
+    def item_description(self, item):
+        return Truncator(item.description).words(DESCRIPTION_WORDS)
+
+    def item_pubdate(self, item):
+        return item.published_at
+
+    def item_updateddate(self, item):
+        return item.updated_at
+
+    def item_author_name(self, item):
+        return item.instructor.get_full_name()
+
+    def item_categories(self, item):
+        return [item.category.name] if item.category else []
+
+
+class CourseRssFeed(RssFeed, CourseFeed):
+    pass
+
+
+class CourseAtomFeed(AtomFeed, CourseFeed):
+    pass
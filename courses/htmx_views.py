@@ -1,13 +1,28 @@
 """
 HTMX Views for dynamic course interactions
 """
+import math
+
 from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponse
+from django.http import Http404, HttpResponse
 from django.template.loader import render_to_string
 from django.views.decorators.http import require_http_methods
 from .models import Course, Lesson, Comment, Review, Enrollment
 from .forms import CommentForm, ReviewForm
+from .catalog import catalog_context
+from .access import is_enrolled
+from .progress import complete_lesson
+from .playback import get_resume_position, record_heartbeat
+from .signed_media import signed_media_url
+from .reviews import get_reviews_page
+from .stats import RATING_FIELDS
+from .conditional import course_preview_validators, lesson_content_validators
+from config.cache import cache_anonymous_page
+from config.conditional import conditional_page
+from config.comments import load_comment_threads
+
+COMMENTS_PER_PAGE = 5
 
 
 @require_http_methods(["GET"])
@@ -15,27 +30,20 @@ def course_list_htmx(request):
     """
     HTMX endpoint for dynamic course filtering
     """
-    courses = Course.objects.filter(is_published=True).select_related('category', 'instructor')
-    
-    # Filters
-    category_slug = request.GET.get('category')
-    difficulty = request.GET.get('difficulty')
-    search_query = request.GET.get('q')
-    sort_by = request.GET.get('sort', '-created_at')
-    
-    if category_slug:
-        courses = courses.filter(category__slug=category_slug)
-    if difficulty:
-        courses = courses.filter(difficulty=difficulty)
-    if search_query:
-        courses = courses.filter(title__icontains=search_query)
-    
-    courses = courses.order_by(sort_by)
-    
-    context = {'courses': courses}
+    context = catalog_context(request)
     return render(request, 'courses/partials/course_grid.html', context)
 
 
+@require_http_methods(["GET"])
+def course_page_htmx(request):
+    """
+    HTMX endpoint for infinite scroll: the cards of the next catalog page
+    plus a sentinel that loads the page after it
+    """
+    context = catalog_context(request)
+    return render(request, 'courses/partials/course_page.html', context)
+
+
 @require_http_methods(["POST"])
 @login_required
 def add_comment_htmx(request, lesson_id):
@@ -45,13 +53,7 @@ def add_comment_htmx(request, lesson_id):
     lesson = get_object_or_404(Lesson, id=lesson_id)
     
     # Check if user is enrolled (comments are only for enrolled users, even for preview lessons to prevent spam)
-    is_enrolled = Enrollment.objects.filter(
-        user=request.user,
-        course=lesson.course,
-        is_active=True
-    ).exists()
-    
-    if not is_enrolled:
+    if not is_enrolled(request, lesson.course_id):
         return HttpResponse('<div class="alert alert-danger">يجب التسجيل في الدورة لإضافة تعليق</div>', status=403)
         
     form = CommentForm(request.POST)
@@ -84,48 +86,46 @@ def load_more_comments(request, lesson_id):
     lesson = get_object_or_404(Lesson, id=lesson_id)
     
     # Check access permissions
-    is_enrolled = Enrollment.objects.filter(
-        user=request.user,
-        course=lesson.course,
-        is_active=True
-    ).exists() if request.user.is_authenticated else False
-    
-    if not (lesson.is_preview or is_enrolled):
+    if not (lesson.is_preview or is_enrolled(request, lesson.course_id)):
         return HttpResponse('<div class="alert alert-danger">غير مصرح لك بالوصول لهذه التعليقات</div>', status=403)
         
-    offset = int(request.GET.get('offset', 0))
-    limit = 5
-    
-    comments = lesson.comments.filter(is_active=True, parent=None).select_related('user')[offset:offset+limit]
+    comments = load_comment_threads(
+        lesson.comments.all(), request.GET.get('cursor'), COMMENTS_PER_PAGE, is_active=True
+    )
     
     context = {
         'comments': comments,
         'lesson': lesson,
-        'offset': offset + limit
     }
     
     return render(request, 'courses/partials/comment_list.html', context)
 
 
-@require_http_methods(["POST"])
+@require_http_methods(["GET", "POST"])
 @login_required
 def add_review_htmx(request, course_slug):
     """
     HTMX endpoint for adding/updating review
+    GET returns the form, a valid POST returns a confirmation plus
+    out-of-band swaps of the saved review and the rating summary.
     """
     course = get_object_or_404(Course, slug=course_slug, is_published=True)
     
     # Check if enrolled
-    is_enrolled = Enrollment.objects.filter(
-        user=request.user,
-        course=course,
-        is_active=True
-    ).exists()
-    
-    if not is_enrolled:
+    if not is_enrolled(request, course):
         return HttpResponse('<div class="alert alert-danger">يجب التسجيل في الدورة أولاً</div>', status=403)
     
     review = Review.objects.filter(user=request.user, course=course).first()
+    
+    if request.method == 'GET':
+        context = {
+            'form': ReviewForm(instance=review),
+            'review': review,
+            'course': course
+        }
+        return render(request, 'courses/partials/review_form.html', context)
+    
+    created = review is None
     form = ReviewForm(request.POST, instance=review)
     
     if form.is_valid():
@@ -134,22 +134,37 @@ def add_review_htmx(request, course_slug):
         review.course = course
         review.save()
         
-        # Return updated reviews section
-        reviews = course.reviews.select_related('user').all()
-        avg_rating = course.average_rating
+        # The aggregates were updated in the database by the Review signals
+        course.refresh_from_db(fields=RATING_FIELDS)
         
         context = {
-            'reviews': reviews,
-            'avg_rating': avg_rating,
+            'review': review,
+            'created': created,
             'course': course
         }
         
-        html = render_to_string('courses/partials/reviews_section.html', context, request=request)
+        html = render_to_string('courses/partials/review_saved.html', context, request=request)
         return HttpResponse(html, headers={'HX-Trigger': 'reviewAdded'})
     
     return HttpResponse('<div class="alert alert-danger">حدث خطأ في إضافة التقييم</div>')
 
 
+@require_http_methods(["GET"])
+@cache_anonymous_page(Course, Review)
+def reviews_htmx(request, course_slug):
+    """
+    HTMX endpoint for the next page of course reviews
+    """
+    course = get_object_or_404(Course, slug=course_slug, is_published=True)
+    
+    context = {
+        'reviews': get_reviews_page(course, request.GET.get('page')),
+        'course': course
+    }
+    
+    return render(request, 'courses/partials/reviews_page.html', context)
+
+
 @require_http_methods(["GET"])
 def search_courses_htmx(request):
     """
@@ -160,10 +175,9 @@ def search_courses_htmx(request):
     if len(query) < 2:
         return HttpResponse('')
     
-    courses = Course.objects.filter(
-        is_published=True,
-        title__icontains=query
-    ).select_related('category')[:5]
+    courses = Course.objects.published().with_card_stats().for_language().search(
+        query
+    ).order_by('-search_rank', '-created_at')[:5]
     
     context = {'courses': courses}
     return render(request, 'courses/partials/search_results.html', context)
@@ -189,6 +203,7 @@ def toggle_wishlist_htmx(request, course_id):
 
 
 @require_http_methods(["GET"])
+@conditional_page(course_preview_validators)
 def course_preview_htmx(request, course_slug):
     """
     HTMX endpoint for course preview modal
@@ -214,19 +229,14 @@ def update_progress_htmx(request, lesson_id):
     
     enrollment = Enrollment.objects.filter(
         user=request.user,
-        course=lesson.course,
+        course_id=lesson.course_id,
         is_active=True
-    ).first()
+    ).only('pk').first() if is_enrolled(request, lesson.course_id) else None
     
     if enrollment:
-        # Update progress logic here
+        # Idempotent: progress is recomputed from the completed lessons
         completed = request.POST.get('completed') == 'true'
-        
-        # Simple progress calculation
-        total_lessons = lesson.course.lessons.count()
-        if total_lessons > 0:
-            enrollment.progress = min(100, (enrollment.progress or 0) + (100 // total_lessons))
-            enrollment.save()
+        enrollment.progress = complete_lesson(enrollment.pk, lesson, completed)
         
         context = {
             'enrollment': enrollment,
@@ -238,6 +248,31 @@ def update_progress_htmx(request, lesson_id):
     return HttpResponse('<div class="alert alert-danger">يجب التسجيل في الدورة لتحديث التقدم</div>', status=403)
 
 
+@require_http_methods(["POST"])
+@login_required
+def lesson_heartbeat_htmx(request, lesson_id):
+    """
+    HTMX endpoint the player posts every few seconds while a lesson plays.
+    Records the playback state, see courses.playback.
+    """
+    course_id = Lesson.objects.filter(id=lesson_id).values_list('course_id', flat=True).first()
+    if course_id is None:
+        raise Http404
+    if not is_enrolled(request, course_id):
+        return HttpResponse(status=403)
+    
+    try:
+        position = float(request.POST.get('position', 0))
+        watched = float(request.POST.get('watched', 0))
+    except ValueError:
+        return HttpResponse(status=400)
+    if not (math.isfinite(position) and math.isfinite(watched)):
+        return HttpResponse(status=400)
+    
+    record_heartbeat(request.user.pk, course_id, lesson_id, position, watched)
+    return HttpResponse(status=204)
+
+
 @require_http_methods(["DELETE"])
 @login_required
 def delete_comment_htmx(request, comment_id):
@@ -255,6 +290,7 @@ def delete_comment_htmx(request, comment_id):
 
 
 @require_http_methods(["GET"])
+@conditional_page(lesson_content_validators)
 def lesson_htmx_content(request, course_slug, lesson_id):
     """
     HTMX endpoint for loading lesson content dynamically
@@ -263,27 +299,25 @@ def lesson_htmx_content(request, course_slug, lesson_id):
     lesson = get_object_or_404(Lesson, id=lesson_id, course=course)
     
     # Check access permissions
-    is_enrolled = Enrollment.objects.filter(
-        user=request.user,
-        course=course,
-        is_active=True
-    ).exists() if request.user.is_authenticated else False
+    enrolled = is_enrolled(request, course)
     
-    if not (lesson.is_preview or is_enrolled):
+    if not (lesson.is_preview or enrolled):
         return HttpResponse('<div class="alert alert-danger">يجب التسجيل في الدورة للوصول لهذا الدرس</div>', status=403)
     
     # Get all lessons for sidebar
     all_lessons = course.lessons.all().order_by('order', 'created_at')
     
-    # Get comments
-    comments = lesson.comments.filter(is_active=True, parent=None).select_related('user')[:5]
+    # Get the first page of comment threads
+    comments = load_comment_threads(lesson.comments.all(), limit=COMMENTS_PER_PAGE, is_active=True)
     
     context = {
         'course': course,
         'lesson': lesson,
         'all_lessons': all_lessons,
         'comments': comments,
-        'is_enrolled': is_enrolled,
+        'is_enrolled': enrolled,
+        'resume_at': get_resume_position(request.user.pk, course.pk, lesson.pk) if enrolled else 0,
+        'video_url': signed_media_url(request, lesson, lesson.video_file) if lesson.video_file else '',
     }
     
     return render(request, 'courses/partials/lesson_content.html', context)
@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Q
+
+from courses.models import Course
+
+
+class Command(BaseCommand):
+    help = 'Compare the indexed catalog search with the legacy icontains filter'
+
+    def add_arguments(self, parser):
+        parser.add_argument('queries', nargs='+', help='Search terms to benchmark')
+        parser.add_argument('--repeat', type=int, default=20, help='Runs per query (default: 20)')
+        parser.add_argument('--explain', action='store_true', help='Print the query plan of both paths')
+
+    def legacy_queryset(self, query):
+        return Course.objects.published().filter(
+            Q(title__icontains=query) |
+            Q(title_en__icontains=query) |
+            Q(description__icontains=query)
+        )
+
+    def indexed_queryset(self, query):
+        return Course.objects.published().search(query).order_by('-search_rank')
+
+    def time_queryset(self, build, query, repeat):
+        rows = 0
+        start = time.perf_counter()
+        for _ in range(repeat):
+            rows = len(list(build(query).values_list('pk', flat=True)))
+        return (time.perf_counter() - start) * 1000 / repeat, rows
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        self.stdout.write(f'Database: {connection.vendor}, {Course.objects.count()} courses, {repeat} runs each')
+
+        for query in options['queries']:
+            legacy_ms, legacy_rows = self.time_queryset(self.legacy_queryset, query, repeat)
+            indexed_ms, indexed_rows = self.time_queryset(self.indexed_queryset, query, repeat)
+            self.stdout.write(
+                f'{query!r}: icontains {legacy_ms:.2f} ms ({legacy_rows} rows) | '
+                f'indexed {indexed_ms:.2f} ms ({indexed_rows} rows)'
+            )
+            if options['explain']:
+                self.stdout.write(self.legacy_queryset(query).explain())
+                self.stdout.write(self.indexed_queryset(query).explain())
@@ -0,0 +1,61 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.signed_media import media_expiry, sign_media_params, verify_media_params
+
+SESSION_KEY = 'k' * 32
+NAME = 'courses/videos/lesson.mp4'
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure the throughput of signing and verifying lesson media URLs '
+        '(courses/signed_media.py); no database access is involved'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations', type=int, default=100000,
+            help='Signatures to create and verify (default: 100000)',
+        )
+
+    def _report(self, label, iterations, elapsed):
+        self.stdout.write(
+            f'{label:<22} {iterations / elapsed:>12,.0f} ops/s  '
+            f'{elapsed / iterations * 1e6:>8.2f} us/op'
+        )
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        if iterations < 1:
+            raise CommandError('--iterations must be positive')
+        expires = media_expiry()
+
+        started = time.perf_counter()
+        signed = [
+            sign_media_params(i % 1000, i % 50, NAME, SESSION_KEY, expires)
+            for i in range(iterations)
+        ]
+        self._report('sign', iterations, time.perf_counter() - started)
+
+        # Query parameters arrive as strings
+        signed = [{key: str(value) for key, value in params.items()} for params in signed]
+
+        started = time.perf_counter()
+        valid = sum(
+            verify_media_params(params, i % 50, SESSION_KEY) is not None
+            for i, params in enumerate(signed)
+        )
+        self._report('verify (valid)', iterations, time.perf_counter() - started)
+
+        started = time.perf_counter()
+        rejected = sum(
+            verify_media_params(params, i % 50 + 1, SESSION_KEY) is None
+            for i, params in enumerate(signed)
+        )
+        self._report('verify (wrong lesson)', iterations, time.perf_counter() - started)
+
+        if valid != iterations or rejected != iterations:
+            raise CommandError(f'{valid} valid and {rejected} rejected of {iterations} signatures')
+        self.stdout.write(self.style.SUCCESS('All signatures verified as expected'))
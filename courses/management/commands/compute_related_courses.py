@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from courses.related import update_related_courses
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the stored related courses (config/related.py). Only courses '
+        'changed since the previous run and the lists they affect are updated '
+        'unless --full is given; run it periodically (e.g. hourly from cron)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Recompute every course, refreshing the term weights and '
+                 'refilling lists shortened by deleted courses',
+        )
+
+    def handle(self, *args, **options):
+        updated = update_related_courses(full=options['full'])
+        self.stdout.write(self.style.SUCCESS(f'Updated the related courses of {updated} course(s)'))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from courses.playback import flush_playback
+
+
+class Command(BaseCommand):
+    help = (
+        'Write the lesson playback heartbeats buffered in the cache to the '
+        'enrollments; run it periodically (e.g. every minute from cron)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Rows per bulk UPDATE statement (default: 500)',
+        )
+
+    def handle(self, *args, **options):
+        updated = flush_playback(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Flushed playback state of {updated} enrollment(s)'))
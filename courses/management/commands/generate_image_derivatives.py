@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from config.images import build_derivatives, get_manifest, iter_image_fields, manifest_field
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate the resized WebP/JPEG copies of course thumbnails, blog '
+        'images and avatars that do not have them yet (see config/images.py)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Regenerate every image, e.g. after changing IMAGE_DERIVATIVE_WIDTHS',
+        )
+
+    def handle(self, *args, **options):
+        for model, field_name in iter_image_fields():
+            rows = model._default_manager.exclude(
+                Q(**{f'{field_name}__isnull': True}) | Q(**{field_name: ''})
+            ).only('pk', field_name, manifest_field(field_name)).order_by('pk')
+
+            built = skipped = failed = 0
+            for instance in rows.iterator(chunk_size=500):
+                if not options['force'] and get_manifest(getattr(instance, field_name)) is not None:
+                    skipped += 1
+                elif build_derivatives(model, instance.pk, field_name):
+                    built += 1
+                else:
+                    failed += 1
+
+            self.stdout.write(
+                f'{model._meta.label}.{field_name}: {built} generated, '
+                f'{skipped} up to date, {failed} missing or unreadable'
+            )
+        self.stdout.write(self.style.SUCCESS('Image derivatives are up to date'))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from courses.models import Course
+from config.cache import bump_cache_version
+from courses.stats import STATS_LABEL, recompute_course_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the denormalized lesson, student and rating counters of courses'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'slugs',
+            nargs='*',
+            help='Only repair the courses with these slugs (default: all courses)',
+        )
+
+    def handle(self, *args, **options):
+        courses = Course.objects.all()
+        if options['slugs']:
+            courses = courses.filter(slug__in=options['slugs'])
+
+        updated = recompute_course_stats(courses)
+        # The UPDATE sends no signals; cached pages must not keep the old counters
+        bump_cache_version(STATS_LABEL)
+        self.stdout.write(self.style.SUCCESS(f'Recomputed statistics for {updated} course(s)'))
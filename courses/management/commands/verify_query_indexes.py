@@ -0,0 +1,145 @@
+import re
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from blog.models import BlogCategory, Post, PostComment
+from courses.models import Category, Comment, Course, Enrollment, Lesson
+from payments.models import Payment
+
+User = get_user_model()
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway dataset, EXPLAIN the hot view querysets and fail if '
+        'any of them still needs a sequential scan of its main table'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--courses', type=int, default=500,
+            help='Number of seeded courses (default: 500); other tables scale from it',
+        )
+
+    def seed(self, size):
+        now = timezone.now()
+        run = uuid.uuid4().hex[:8]
+
+        users = User.objects.bulk_create([
+            User(username=f'idx-{run}-{i}', email=f'idx-{run}-{i}@example.com')
+            for i in range(size // 5 + 1)
+        ])
+        category = Category.objects.create(name=f'idx-{run}', slug=f'idx-{run}')
+        courses = Course.objects.bulk_create([
+            Course(
+                title=f'idx {i}', slug=f'idx-{run}-{i}', description='-',
+                category=category, instructor=users[i % len(users)],
+                thumbnail='', price=i % 50,
+                is_published=i % 4 != 0, is_featured=i % 20 == 0,
+                created_at=now - timedelta(hours=i),
+            )
+            for i in range(size)
+        ])
+        lessons = Lesson.objects.bulk_create([
+            Lesson(course=course, title=f'idx {n}', order=n)
+            for course in courses for n in range(5)
+        ])
+        Enrollment.objects.bulk_create([
+            Enrollment(user=user, course=courses[(u * 7 + n) % size])
+            for u, user in enumerate(users) for n in range(5)
+        ], ignore_conflicts=True)
+        Comment.objects.bulk_create([
+            Comment(lesson=lessons[i % len(lessons)], user=users[i % len(users)], content='-')
+            for i in range(size * 4)
+        ])
+
+        blog_category = BlogCategory.objects.create(name=f'idx-{run}', slug=f'idx-{run}')
+        posts = Post.objects.bulk_create([
+            Post(
+                title=f'idx {i}', slug=f'idx-{run}-{i}', author=users[i % len(users)],
+                category=blog_category, excerpt='-', content='-',
+                status='published' if i % 3 else 'draft', is_featured=i % 15 == 0,
+                published_at=now - timedelta(hours=i),
+            )
+            for i in range(size)
+        ])
+        PostComment.objects.bulk_create([
+            PostComment(post=posts[i % size], user=users[i % len(users)], content='-')
+            for i in range(size * 4)
+        ])
+        Payment.objects.bulk_create([
+            Payment(
+                user=users[i % len(users)], course=courses[i % size], amount=10,
+                stripe_payment_intent_id=f'pi_{run}_{i}',
+            )
+            for i in range(size)
+        ])
+        return users[0], courses[1], lessons[5], posts[1], category, run
+
+    def checks(self, user, course, lesson, post, category, run):
+        """(label, queryset) pairs mirroring the view queries"""
+        return [
+            ('home: featured courses',
+             Course.objects.published().featured().order_by('-created_at')[:6]),
+            ('home: recent courses',
+             Course.objects.published().order_by('-created_at')[:8]),
+            ('category_view: courses',
+             Course.objects.published().filter(category=category)),
+            ('enrollment access check',
+             Enrollment.objects.filter(user=user, course=course, is_active=True)[:1]),
+            ('course lessons',
+             Lesson.objects.filter(course=course).order_by('order', 'created_at')),
+            ('lesson comment threads page',
+             Comment.objects.filter(lesson=lesson, is_active=True, parent=None).order_by('created_at', 'id')[:6]),
+            ('blog comment threads page',
+             PostComment.objects.filter(post=post, is_approved=True, parent=None).order_by('created_at', 'id')[:11]),
+            ('blog_list_view: posts',
+             Post.objects.filter(status='published').order_by('-published_at')[:9]),
+            ('blog_list_view: featured posts',
+             Post.objects.filter(status='published', is_featured=True).order_by('-published_at')[:3]),
+            ('payment_intent webhook lookup',
+             Payment.objects.filter(stripe_payment_intent_id=f'pi_{run}_1')[:1]),
+        ]
+
+    def full_scan(self, plan, table):
+        return re.search(rf'Seq Scan on {table}\b', plan) is not None
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('verify_query_indexes needs the PostgreSQL database used in production')
+
+        failures = []
+        try:
+            with transaction.atomic():
+                seeded = self.seed(options['courses'])
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE')
+                    # Make the planner pick any usable index over a scan, so
+                    # a remaining Seq Scan means no index fits the query
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+
+                for label, queryset in self.checks(*seeded):
+                    plan = queryset.explain()
+                    table = queryset.model._meta.db_table
+                    if self.full_scan(plan, table):
+                        failures.append(label)
+                        self.stdout.write(self.style.ERROR(f'SEQ SCAN  {label}'))
+                        self.stdout.write(plan)
+                    else:
+                        self.stdout.write(self.style.SUCCESS(f'INDEXED   {label}'))
+                raise Rollback
+        except Rollback:
+            pass
+
+        if failures:
+            raise CommandError(f'{len(failures)} queryset(s) fall back to a sequential scan')
+        self.stdout.write(self.style.SUCCESS('All hot querysets use an index'))
@@ -0,0 +1,55 @@
+# Generated manually to add denormalized course statistics
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def populate_course_stats(apps, schema_editor):
+    Course = apps.get_model('courses', 'Course')
+    Lesson = apps.get_model('courses', 'Lesson')
+    Enrollment = apps.get_model('courses', 'Enrollment')
+    Review = apps.get_model('courses', 'Review')
+
+    def per_course(model, aggregate, **filters):
+        return Coalesce(Subquery(
+            model.objects.filter(course=OuterRef('pk'), **filters)
+            .order_by().values('course').annotate(value=aggregate).values('value')
+        ), Value(0))
+
+    Course.objects.update(
+        lessons_count=per_course(Lesson, Count('pk')),
+        students_count=per_course(Enrollment, Count('pk'), is_active=True),
+        rating_sum=per_course(Review, Sum('rating')),
+        rating_count=per_course(Review, Count('pk')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0004_lesson_is_published'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='lessons_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='عدد الدروس'),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='students_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='عدد الطلاب'),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='مجموع التقييمات'),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='عدد التقييمات'),
+        ),
+        migrations.RunPython(populate_course_stats, migrations.RunPython.noop),
+    ]
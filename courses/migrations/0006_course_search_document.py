@@ -0,0 +1,87 @@
+# Generated manually to add the catalog full-text search document
+import re
+
+from django.db import migrations, models
+
+# Frozen copies of courses.search as of this migration, so later changes to
+# the app code cannot break or alter it
+GIN_INDEX_NAME = 'course_search_gin'
+SEARCH_CONFIG = 'simple'
+LANGUAGES = ('ar', 'en')
+
+ARABIC_DIACRITICS_RE = re.compile('[\u0610-\u061a\u064b-\u065f\u0670\u0640]')
+ARABIC_LETTER_FOLDS = str.maketrans({
+    'أ': 'ا',
+    'إ': 'ا',
+    'آ': 'ا',
+    'ٱ': 'ا',
+    'ؤ': 'و',
+    'ئ': 'ي',
+    'ى': 'ي',
+    'ة': 'ه',
+})
+TOKEN_RE = re.compile(r'[^\W_]+')
+
+
+def normalize_text(text):
+    if not text:
+        return ''
+    text = ARABIC_DIACRITICS_RE.sub('', str(text).lower())
+    text = text.translate(ARABIC_LETTER_FOLDS)
+    return ' '.join(TOKEN_RE.findall(text))
+
+
+def localized_text(course, field):
+    return ' '.join(getattr(course, f'{field}_{code}', None) or '' for code in LANGUAGES)
+
+
+def populate_search_fields(apps, schema_editor):
+    Course = apps.get_model('courses', 'Course')
+    courses = list(Course.objects.all())
+    for course in courses:
+        course.search_title = normalize_text(localized_text(course, 'title'))
+        course.search_text = normalize_text(localized_text(course, 'description'))
+    Course.objects.bulk_update(courses, ['search_title', 'search_text'], batch_size=500)
+
+
+def create_search_index(apps, schema_editor):
+    # The GIN expression index is PostgreSQL-only, so it is created here
+    # rather than declared in Course.Meta.indexes
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    from django.contrib.postgres.indexes import GinIndex
+    from django.contrib.postgres.search import SearchVector
+
+    vector = (
+        SearchVector('search_title', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('search_text', weight='B', config=SEARCH_CONFIG)
+    )
+    schema_editor.add_index(apps.get_model('courses', 'Course'), GinIndex(vector, name=GIN_INDEX_NAME))
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS {schema_editor.quote_name(GIN_INDEX_NAME)}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0005_course_stats_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='search_title',
+            field=models.TextField(blank=True, editable=False, verbose_name='نص البحث للعنوان'),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='search_text',
+            field=models.TextField(blank=True, editable=False, verbose_name='نص البحث'),
+        ),
+        migrations.RunPython(populate_search_fields, migrations.RunPython.noop),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.1 on 2026-10-18 00:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0007_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LessonCompletion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('completed_at', models.DateTimeField(auto_now_add=True, verbose_name='تاريخ الإكمال')),
+                ('enrollment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='completions', to='courses.enrollment', verbose_name='التسجيل')),
+                ('lesson', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='completions', to='courses.lesson', verbose_name='الدرس')),
+            ],
+            options={
+                'verbose_name': 'إكمال درس',
+                'verbose_name_plural': 'الدروس المكتملة',
+                'unique_together': {('enrollment', 'lesson')},
+            },
+        ),
+    ]
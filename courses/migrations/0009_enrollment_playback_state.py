@@ -0,0 +1,34 @@
+# Generated by Django 6.0.1 on 2026-10-18 00:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0008_lesson_completion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='enrollment',
+            name='last_accessed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='آخر نشاط'),
+        ),
+        migrations.AddField(
+            model_name='enrollment',
+            name='last_lesson',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='courses.lesson', verbose_name='آخر درس'),
+        ),
+        migrations.AddField(
+            model_name='enrollment',
+            name='last_position',
+            field=models.PositiveIntegerField(default=0, verbose_name='آخر موضع (ثانية)'),
+        ),
+        migrations.AddField(
+            model_name='enrollment',
+            name='watched_seconds',
+            field=models.PositiveIntegerField(default=0, verbose_name='مدة المشاهدة (ثانية)'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-18 00:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0009_enrollment_playback_state'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='comment',
+            name='comment_lesson_thread_idx',
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['lesson', 'is_active', 'parent', 'created_at', 'id'], name='comment_lesson_cursor_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 6.0.1 on 2026-10-18 00:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0012_course_thumbnail_derivatives'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedCourse',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='درجة التشابه')),
+                ('rank', models.PositiveSmallIntegerField(verbose_name='الترتيب')),
+                ('computed_at', models.DateTimeField(verbose_name='تاريخ الحساب')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_entries', to='courses.course', verbose_name='الدورة')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='courses.course', verbose_name='الدورة ذات الصلة')),
+            ],
+            options={
+                'verbose_name': 'دورة ذات صلة',
+                'verbose_name_plural': 'الدورات ذات الصلة',
+                'ordering': ['course', 'rank'],
+                'constraints': [models.UniqueConstraint(fields=('course', 'rank'), name='relatedcourse_course_rank_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 6.0.1 on 2026-10-18 01:07
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_published_at(apps, schema_editor):
+    # The publication date of existing courses is unknown; their creation
+    # date keeps the feed order they had so far
+    Course = apps.get_model('courses', 'Course')
+    Course.objects.filter(is_published=True, published_at__isnull=True).update(
+        published_at=models.F('created_at'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0013_related_courses'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='published_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='تاريخ النشر'),
+        ),
+        migrations.RunPython(backfill_published_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['is_published', '-published_at'], name='course_pub_published_idx'),
+        ),
+    ]
@@ -2,9 +2,12 @@
 Models for courses app - Updated for django-modeltranslation
 """
 from django.db import models
+from django.db.models import Case, F, FloatField, Value, When
+from django.db.models.functions import Cast
 from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.text import slugify
 
 
@@ -34,6 +37,73 @@ class Category(models.Model):
         super().save(*args, **kwargs)
 
 
+class CourseQuerySet(models.QuerySet):
+    """
+    Composable catalog queries shared by every course listing view.
+
+    Query budget per page, with the card stats read from the stored
+    counters (see courses.stats):
+      - course_list_view / category_view: 1 query for the course cards
+      - home_view: 2 queries (featured + recent)
+      - course_list_htmx / search_courses_htmx: 1 query
+    """
+
+    # Columns a course card renders; everything else stays deferred
+    CARD_FIELDS = (
+        'id', 'slug', 'title', 'description', 'thumbnail', 'thumbnail_derivatives', 'price',
+        'difficulty', 'is_featured', 'created_at',
+        'lessons_count', 'students_count', 'rating_sum', 'rating_count',
+        'category__id', 'category__name', 'category__slug',
+        'instructor__id', 'instructor__username',
+        'instructor__first_name', 'instructor__last_name',
+    )
+
+    def published(self):
+        return self.filter(is_published=True)
+
+    def featured(self):
+        return self.filter(is_featured=True)
+
+    def search(self, query):
+        """Full-text search over both languages, annotated with search_rank"""
+        from .search import search_courses
+        return search_courses(self, query)
+
+    def with_card_stats(self):
+        """
+        Join category and instructor, restrict the SELECT to card columns
+        and annotate ``rating_avg`` so one statement feeds the whole grid.
+        """
+        return self.select_related('category', 'instructor').only(
+            *self.CARD_FIELDS
+        ).annotate(
+            rating_avg=Case(
+                When(rating_count=0, then=Value(0.0)),
+                default=Cast(F('rating_sum'), FloatField()) / F('rating_count'),
+                output_field=FloatField(),
+            )
+        )
+
+    def for_language(self, language=None):
+        """
+        Defer the translated columns of languages that can never be shown
+        for ``language`` (neither it nor one of its fallbacks).
+        """
+        from django.utils import translation
+        from modeltranslation.translator import translator
+        from modeltranslation.utils import build_localized_fieldname, resolution_order
+
+        language = language or translation.get_language() or settings.LANGUAGE_CODE
+        visible = resolution_order(language.split('-')[0])
+        hidden = [
+            build_localized_fieldname(field, code)
+            for field in translator.get_options_for_model(self.model).fields
+            for code, _name in settings.LANGUAGES
+            if code not in visible
+        ]
+        return self.defer(*hidden) if hidden else self
+
+
 class Course(models.Model):
     """
     Main course model
@@ -63,6 +133,9 @@ class Course(models.Model):
 
     # Course details
     thumbnail = models.ImageField(_('صورة الدورة'), upload_to='courses/thumbnails/')
+    thumbnail_derivatives = models.JSONField(
+        _('نسخ الصورة المصغرة'), default=dict, blank=True, editable=False
+    )
     price = models.DecimalField(_('السعر'), max_digits=10, decimal_places=2)
     difficulty = models.CharField(
         _('مستوى الصعوبة'),
@@ -75,15 +148,42 @@ class Course(models.Model):
     # Course status
     is_published = models.BooleanField(_('منشورة'), default=False)
     is_featured = models.BooleanField(_('مميزة'), default=False)
+    # Set the first time the course is saved as published
+    published_at = models.DateTimeField(_('تاريخ النشر'), null=True, blank=True, editable=False)
+
+    # Denormalized statistics, maintained by courses.signals and repaired
+    # in bulk by the recompute_course_stats management command
+    lessons_count = models.PositiveIntegerField(_('عدد الدروس'), default=0, editable=False)
+    students_count = models.PositiveIntegerField(_('عدد الطلاب'), default=0, editable=False)
+    rating_sum = models.PositiveIntegerField(_('مجموع التقييمات'), default=0, editable=False)
+    rating_count = models.PositiveIntegerField(_('عدد التقييمات'), default=0, editable=False)
+    # Rating histogram: number of reviews per star
+    rating_1_count = models.PositiveIntegerField(_('تقييمات بنجمة واحدة'), default=0, editable=False)
+    rating_2_count = models.PositiveIntegerField(_('تقييمات بنجمتين'), default=0, editable=False)
+    rating_3_count = models.PositiveIntegerField(_('تقييمات بثلاث نجوم'), default=0, editable=False)
+    rating_4_count = models.PositiveIntegerField(_('تقييمات بأربع نجوم'), default=0, editable=False)
+    rating_5_count = models.PositiveIntegerField(_('تقييمات بخمس نجوم'), default=0, editable=False)
+
+    # Normalized search document for both languages, see courses.search
+    search_title = models.TextField(_('نص البحث للعنوان'), blank=True, editable=False)
+    search_text = models.TextField(_('نص البحث'), blank=True, editable=False)
 
     # Timestamps
     created_at = models.DateTimeField(_('تاريخ الإنشاء'), auto_now_add=True)
     updated_at = models.DateTimeField(_('تاريخ التحديث'), auto_now=True)
 
+    objects = CourseQuerySet.as_manager()
+
     class Meta:
         verbose_name = _('دورة')
         verbose_name_plural = _('الدورات')
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['is_published', 'is_featured'], name='course_pub_featured_idx'),
+            models.Index(fields=['is_published', '-created_at'], name='course_pub_created_idx'),
+            models.Index(fields=['is_published', '-published_at'], name='course_pub_published_idx'),
+            models.Index(fields=['category', 'is_published'], name='course_category_pub_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -93,6 +193,17 @@ class Course(models.Model):
             from django.utils import translation
             with translation.override('en'):
                 self.slug = slugify(str(self.title))
+
+        from .search import build_search_fields
+        self.search_title, self.search_text = build_search_fields(self)
+        derived_fields = {'search_title', 'search_text'}
+        publishing = not {'is_published', 'published_at'} & self.get_deferred_fields()
+        if publishing and self.is_published and self.published_at is None:
+            self.published_at = timezone.now()
+            derived_fields.add('published_at')
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | derived_fields
         super().save(*args, **kwargs)
 
     def get_absolute_url(self):
@@ -100,19 +211,30 @@ class Course(models.Model):
 
     @property
     def total_lessons(self):
-        return self.lessons.count()
+        return self.lessons_count
 
     @property
     def total_students(self):
-        return self.enrollments.filter(is_active=True).count()
+        return self.students_count
 
     @property
     def average_rating(self):
-        reviews = self.reviews.all()
-        if reviews:
-            return sum(r.rating for r in reviews) / len(reviews)
+        if hasattr(self, 'rating_avg'):
+            return self.rating_avg
+        if self.rating_count:
+            return self.rating_sum / self.rating_count
         return 0
 
+    @property
+    def rating_histogram(self):
+        """(stars, count, percent) from five stars down to one"""
+        histogram = []
+        for stars in range(5, 0, -1):
+            count = getattr(self, f'rating_{stars}_count')
+            percent = round(count * 100 / self.rating_count) if self.rating_count else 0
+            histogram.append((stars, count, percent))
+        return histogram
+
 
 class Lesson(models.Model):
     """
@@ -145,6 +267,9 @@ class Lesson(models.Model):
         verbose_name = _('درس')
         verbose_name_plural = _('الدروس')
         ordering = ['order', 'created_at']
+        indexes = [
+            models.Index(fields=['course', 'order', 'created_at'], name='lesson_course_order_idx'),
+        ]
 
     def __str__(self):
         return f"{self.course.title} - {self.title}"
@@ -171,16 +296,60 @@ class Enrollment(models.Model):
     progress = models.PositiveIntegerField(_('نسبة الإنجاز'), default=0)
     completed_at = models.DateTimeField(_('تاريخ الإكمال'), null=True, blank=True)
 
+    # Playback state, written in batches from the heartbeat buffer (courses.playback)
+    last_lesson = models.ForeignKey(
+        Lesson,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name=_('آخر درس')
+    )
+    last_position = models.PositiveIntegerField(_('آخر موضع (ثانية)'), default=0)
+    watched_seconds = models.PositiveIntegerField(_('مدة المشاهدة (ثانية)'), default=0)
+    last_accessed_at = models.DateTimeField(_('آخر نشاط'), null=True, blank=True)
+
     class Meta:
         verbose_name = _('تسجيل')
         verbose_name_plural = _('التسجيلات')
         unique_together = ['user', 'course']
         ordering = ['-enrolled_at']
+        indexes = [
+            models.Index(fields=['user', 'course', 'is_active'], name='enrollment_user_active_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.course.title}"
 
 
+class LessonCompletion(models.Model):
+    """
+    A lesson completed by an enrolled student. Enrollment.progress is
+    derived from these rows, see courses.progress.
+    """
+    enrollment = models.ForeignKey(
+        Enrollment,
+        on_delete=models.CASCADE,
+        related_name='completions',
+        verbose_name=_('التسجيل')
+    )
+    lesson = models.ForeignKey(
+        Lesson,
+        on_delete=models.CASCADE,
+        related_name='completions',
+        verbose_name=_('الدرس')
+    )
+    completed_at = models.DateTimeField(_('تاريخ الإكمال'), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _('إكمال درس')
+        verbose_name_plural = _('الدروس المكتملة')
+        unique_together = ['enrollment', 'lesson']
+
+    def __str__(self):
+        return f"{self.enrollment} - {self.lesson.title}"
+
+
 class Comment(models.Model):
     """
     Comments on course lessons
@@ -214,6 +383,13 @@ class Comment(models.Model):
         verbose_name = _('تعليق')
         verbose_name_plural = _('التعليقات')
         ordering = ['created_at']
+        indexes = [
+            # Serves the (created_at, id) keyset pages of config.comments
+            models.Index(
+                fields=['lesson', 'is_active', 'parent', 'created_at', 'id'],
+                name='comment_lesson_cursor_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.lesson.title}"
@@ -247,4 +423,36 @@ class Review(models.Model):
         ordering = ['-created_at']
 
     def __str__(self):
-        return f"{self.user.username} - {self.course.title} ({self.rating}★)"
\ No newline at end of file
+        return f"{self.user.username} - {self.course.title} ({self.rating}★)"
+
+
+class RelatedCourse(models.Model):
+    """
+    Precomputed related courses of a course, best first (see config.related)
+    """
+    course = models.ForeignKey(
+        Course,
+        on_delete=models.CASCADE,
+        related_name='related_entries',
+        verbose_name=_('الدورة')
+    )
+    related = models.ForeignKey(
+        Course,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name=_('الدورة ذات الصلة')
+    )
+    score = models.FloatField(_('درجة التشابه'))
+    rank = models.PositiveSmallIntegerField(_('الترتيب'))
+    computed_at = models.DateTimeField(_('تاريخ الحساب'))
+
+    class Meta:
+        verbose_name = _('دورة ذات صلة')
+        verbose_name_plural = _('الدورات ذات الصلة')
+        ordering = ['course', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['course', 'rank'], name='relatedcourse_course_rank_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.course_id} -> {self.related_id}"
@@ -0,0 +1,168 @@
+"""
+Write-behind buffer for lesson playback heartbeats
+
+The player reports its position every HEARTBEAT_INTERVAL seconds. A
+heartbeat only touches the shared cache: the latest playback state of the
+(user, course) pair is overwritten, the watched seconds are added to a
+counter, and the pair is queued for the next flush the first time it
+becomes dirty. ``manage.py flush_playback`` drains the queue and writes
+all buffered states to Enrollment with one bulk_update(); the
+academy-flush-counters cron job in render.yaml runs it every minute.
+
+Readers (the dashboard and the lesson player) look at the cache first and
+fall back to the last flushed values stored on Enrollment.
+
+The buffer needs a cache with atomic increments that keep their expiry
+(settings.CACHE_ATOMIC_INCR, i.e. Redis), or watched seconds get lost. On
+any other backend each heartbeat is a single UPDATE of the Enrollment row
+and readers use that row directly.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+
+from config.cache import incr_counter
+
+HEARTBEAT_INTERVAL = 15
+# Upper bound for the watched seconds a single heartbeat may report
+MAX_WATCHED_PER_HEARTBEAT = HEARTBEAT_INTERVAL * 2
+
+PLAYBACK_KEY = 'playback:state:{}:{}'
+WATCHED_KEY = 'playback:watched:{}:{}'
+DIRTY_KEY = 'playback:dirty:{}:{}'
+QUEUE_KEY = 'playback:queue:{}'
+QUEUE_SEQ_KEY = 'playback:queue:seq'
+QUEUE_FLUSHED_KEY = 'playback:queue:flushed'
+
+PLAYBACK_TIMEOUT = 60 * 60 * 24 * 7
+# A pair whose queue slot got lost is queued again once its flag expires
+DIRTY_TIMEOUT = 60 * 10
+
+
+def _write_heartbeat(user_id, course_id, lesson_id, position, watched):
+    from .dashboard import invalidate_dashboard
+    from .models import Enrollment
+
+    updated = Enrollment.objects.filter(user_id=user_id, course_id=course_id).update(
+        last_lesson_id=lesson_id,
+        last_position=position,
+        last_accessed_at=timezone.now(),
+        watched_seconds=F('watched_seconds') + watched,
+    )
+    if updated:
+        invalidate_dashboard(user_id)
+
+
+def record_heartbeat(user_id, course_id, lesson_id, position, watched=0):
+    """Record one heartbeat, in the cache when it can buffer it"""
+    position = max(int(position), 0)
+    watched = min(max(int(watched), 0), MAX_WATCHED_PER_HEARTBEAT)
+    if not settings.CACHE_ATOMIC_INCR:
+        _write_heartbeat(user_id, course_id, lesson_id, position, watched)
+        return
+
+    cache.set(PLAYBACK_KEY.format(user_id, course_id), {
+        'lesson_id': lesson_id,
+        'position': position,
+        'at': timezone.now(),
+    }, PLAYBACK_TIMEOUT)
+
+    if watched:
+        incr_counter(WATCHED_KEY.format(user_id, course_id), watched, PLAYBACK_TIMEOUT)
+
+    if cache.add(DIRTY_KEY.format(user_id, course_id), 1, DIRTY_TIMEOUT):
+        slot = incr_counter(QUEUE_SEQ_KEY, 1, PLAYBACK_TIMEOUT)
+        cache.set(QUEUE_KEY.format(slot), (user_id, course_id), PLAYBACK_TIMEOUT)
+
+
+def get_playback_states(user_id, course_ids):
+    """Return {course_id: state} for the buffered states of a user"""
+    if not settings.CACHE_ATOMIC_INCR:
+        return {}
+    keys = {PLAYBACK_KEY.format(user_id, course_id): course_id for course_id in course_ids}
+    return {keys[key]: state for key, state in cache.get_many(list(keys)).items()}
+
+
+def get_resume_position(user_id, course_id, lesson_id):
+    """Latest position in ``lesson_id``, or 0 if the user left it elsewhere"""
+    if not settings.CACHE_ATOMIC_INCR:
+        from .models import Enrollment
+
+        return Enrollment.objects.filter(
+            user_id=user_id, course_id=course_id, last_lesson_id=lesson_id,
+        ).values_list('last_position', flat=True).first() or 0
+
+    state = cache.get(PLAYBACK_KEY.format(user_id, course_id))
+    if state and state['lesson_id'] == lesson_id:
+        return state['position']
+    return 0
+
+
+def _take_watched(pair):
+    key = WATCHED_KEY.format(*pair)
+    watched = cache.get(key) or 0
+    if watched:
+        # decr rather than delete keeps heartbeats that raced the read
+        cache.decr(key, watched)
+    return watched
+
+
+def flush_playback(batch_size=500):
+    """
+    Write every queued playback state to its Enrollment. Returns the number
+    of enrollments updated.
+    """
+    from .dashboard import invalidate_dashboard
+    from .models import Enrollment, Lesson
+
+    last = cache.get(QUEUE_SEQ_KEY, 0)
+    flushed = cache.get(QUEUE_FLUSHED_KEY, 0)
+    if last < flushed:
+        # The sequence was evicted and restarted from 1
+        flushed = 0
+    slots = [QUEUE_KEY.format(n) for n in range(flushed + 1, last + 1)]
+    pairs = set(cache.get_many(slots).values())
+    if not pairs:
+        cache.set(QUEUE_FLUSHED_KEY, last, None)
+        return 0
+
+    # Clear the flags first: heartbeats arriving from now on queue again
+    cache.delete_many([DIRTY_KEY.format(*pair) for pair in pairs])
+    states = cache.get_many([PLAYBACK_KEY.format(*pair) for pair in pairs])
+    # Lessons deleted since the heartbeat must not break the whole batch
+    lesson_ids = set(Lesson.objects.filter(
+        pk__in={state['lesson_id'] for state in states.values()}
+    ).values_list('pk', flat=True))
+
+    enrollments = Enrollment.objects.filter(
+        user_id__in={user_id for user_id, _ in pairs},
+        course_id__in={course_id for _, course_id in pairs},
+    ).only(
+        'pk', 'user_id', 'course_id',
+        'last_lesson', 'last_position', 'last_accessed_at', 'watched_seconds',
+    )
+
+    updated = []
+    for enrollment in enrollments:
+        pair = (enrollment.user_id, enrollment.course_id)
+        if pair not in pairs:
+            continue
+        state = states.get(PLAYBACK_KEY.format(*pair))
+        if state and state['lesson_id'] in lesson_ids:
+            enrollment.last_lesson_id = state['lesson_id']
+            enrollment.last_position = state['position']
+            enrollment.last_accessed_at = state['at']
+        enrollment.watched_seconds += _take_watched(pair)
+        updated.append(enrollment)
+
+    Enrollment.objects.bulk_update(
+        updated,
+        ['last_lesson', 'last_position', 'last_accessed_at', 'watched_seconds'],
+        batch_size=batch_size,
+    )
+    for user_id in {enrollment.user_id for enrollment in updated}:
+        invalidate_dashboard(user_id)
+    cache.delete_many(slots)
+    cache.set(QUEUE_FLUSHED_KEY, last, None)
+    return len(updated)
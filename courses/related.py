@@ -0,0 +1,55 @@
+"""
+Related courses: TF-IDF over the titles and descriptions of published
+courses in every language, plus their category (see config.related)
+
+Courses without a stored list yet (new courses, or before the first
+compute_related_courses run) show the newest courses of their category.
+"""
+from config.localization import localized_related_fields
+from config.related import changed_since_last_run, document_tokens, recompute_related
+from .models import Course, RelatedCourse
+
+RELATED_COURSES_SHOWN = 4
+
+
+def _corpus():
+    queryset = Course.objects.filter(is_published=True)
+    documents = {}
+    categories = {}
+    # search_title and search_text already hold both languages, normalized
+    for pk, category_id, title, text in queryset.values_list(
+        'pk', 'category_id', 'search_title', 'search_text'
+    ).iterator():
+        documents[pk] = document_tokens(title, text)
+        categories[pk] = category_id
+    return queryset, documents, categories
+
+
+def update_related_courses(full=False):
+    """Recompute the stored related courses; returns the number of courses updated"""
+    queryset, documents, categories = _corpus()
+    changed = None if full else changed_since_last_run(RelatedCourse, 'course', queryset, documents)
+    return recompute_related(RelatedCourse, 'course', documents, categories, changed)
+
+
+# The sidebar links the related courses by title
+RELATED_FIELDS = (
+    'course_id', 'related_id', 'rank', 'related__id', 'related__slug',
+    'related__title', *localized_related_fields('related', 'title'),
+)
+
+
+def get_related_courses(course, limit=RELATED_COURSES_SHOWN):
+    related = [
+        entry.related
+        for entry in RelatedCourse.objects.filter(
+            course=course,
+            related__is_published=True,
+        ).select_related('related').only(*RELATED_FIELDS).order_by('rank')[:limit]
+    ]
+    if related or course.category_id is None:
+        return related
+    return list(Course.objects.filter(
+        is_published=True,
+        category_id=course.category_id,
+    ).exclude(pk=course.pk).only('id', 'slug', 'title').order_by('-published_at', '-pk')[:limit])
@@ -0,0 +1,17 @@
+"""
+Paginated course reviews
+
+The total comes from the stored Course.rating_count (see courses.stats),
+so a page of reviews costs one query and no COUNT.
+"""
+from django.core.paginator import Paginator
+
+REVIEWS_PER_PAGE = 10
+
+
+def get_reviews_page(course, number=1):
+    """Return the requested Page of a course's reviews, newest first"""
+    reviews = course.reviews.select_related('user').order_by('-created_at', '-pk')
+    paginator = Paginator(reviews, REVIEWS_PER_PAGE)
+    paginator.count = course.rating_count
+    return paginator.get_page(number)
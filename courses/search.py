@@ -0,0 +1,127 @@
+"""
+Catalog full-text search
+
+Each course keeps two normalized plain-text columns covering both
+modeltranslation languages: ``search_title`` (weight A) and
+``search_text`` (weight B). On PostgreSQL they are matched through a GIN
+expression index over COURSE_SEARCH_VECTOR and ranked with ts_rank; other
+databases (SQLite in tests) fall back to substring matching on the same
+normalized columns.
+"""
+import re
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Case, DecimalField, Q, Value, When
+from django.db.models.functions import Cast
+
+# Arabic tashkeel, superscript alef and tatweel
+ARABIC_DIACRITICS_RE = re.compile('[\u0610-\u061a\u064b-\u065f\u0670\u0640]')
+
+ARABIC_LETTER_FOLDS = str.maketrans({
+    'أ': 'ا',
+    'إ': 'ا',
+    'آ': 'ا',
+    'ٱ': 'ا',
+    'ؤ': 'و',
+    'ئ': 'ي',
+    'ى': 'ي',
+    'ة': 'ه',
+})
+
+TOKEN_RE = re.compile(r'[^\W_]+')
+
+# Text search configuration: stemming is not applied so Arabic and English
+# behave the same way, normalization happens in normalize_text() instead
+SEARCH_CONFIG = 'simple'
+
+GIN_INDEX_NAME = 'course_search_gin'
+
+# search_rank type, shared by both backends and the catalog cursor
+RANK_FIELD = DecimalField(max_digits=12, decimal_places=6)
+
+
+def normalize_text(text):
+    """
+    Lowercase, strip Arabic diacritics and fold alef/hamza forms, alef
+    maqsura and taa marbuta, then collapse whitespace.
+    """
+    if not text:
+        return ''
+    text = ARABIC_DIACRITICS_RE.sub('', str(text).lower())
+    text = text.translate(ARABIC_LETTER_FOLDS)
+    return ' '.join(TOKEN_RE.findall(text))
+
+
+def localized_values(instance, field):
+    """Values of every translation column of ``field`` on ``instance``"""
+    return [
+        getattr(instance, f'{field}_{code}', None) or ''
+        for code, _name in settings.LANGUAGES
+    ]
+
+
+def build_search_fields(course):
+    """Return the (search_title, search_text) pair for a course"""
+    title = ' '.join(localized_values(course, 'title'))
+    text = ' '.join(localized_values(course, 'description'))
+    return normalize_text(title), normalize_text(text)
+
+
+def search_vector():
+    from django.contrib.postgres.search import SearchVector
+
+    return (
+        SearchVector('search_title', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('search_text', weight='B', config=SEARCH_CONFIG)
+    )
+
+
+def search_index():
+    """
+    GIN index over the exact vector expression used by search_courses(), so
+    PostgreSQL can match it against the WHERE clause.
+    """
+    from django.contrib.postgres.indexes import GinIndex
+
+    return GinIndex(search_vector(), name=GIN_INDEX_NAME)
+
+
+def search_courses(queryset, query):
+    """
+    Filter ``queryset`` to courses matching ``query`` and annotate
+    ``search_rank``. Every query term must match, the last one as a prefix
+    so live search works while the user is still typing.
+    """
+    tokens = normalize_text(query).split()
+    if not tokens:
+        return queryset.none()
+
+    if connections[queryset.db].vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+
+        terms = [f'{token}:*' if i == len(tokens) - 1 else token for i, token in enumerate(tokens)]
+        ts_query = SearchQuery(' & '.join(terms), config=SEARCH_CONFIG, search_type='raw')
+        return queryset.alias(
+            search=search_vector()
+        ).filter(
+            search=ts_query
+        ).annotate(
+            # ts_rank is a real; a fixed-precision numeric survives the round
+            # trip through the page cursor and compares equal to itself
+            search_rank=Cast(SearchRank(search_vector(), ts_query), RANK_FIELD)
+        )
+
+    condition = Q()
+    title_hits = Q()
+    for token in tokens:
+        condition &= Q(search_title__contains=token) | Q(search_text__contains=token)
+        title_hits &= Q(search_title__contains=token)
+    return queryset.filter(condition).annotate(
+        search_rank=Case(
+            When(title_hits, then=Value(Decimal(2))),
+            default=Value(Decimal(1)),
+            output_field=RANK_FIELD,
+        )
+    )
@@ -0,0 +1,189 @@
+"""
+Signal receivers keeping the denormalized Course statistics, enrollment
+progress, the shared cache versions, the cached enrollment access sets
+and dashboards and the thumbnail derivatives up to date
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from config.cache import bump_cache_version
+from config.images import schedule_derivatives
+from .access import invalidate_enrollments
+from .dashboard import invalidate_dashboard
+from .feeds import FEED_LABEL
+from .models import Category, Comment, Course, Enrollment, Lesson, Review
+from .progress import refresh_progress
+from .stats import RATING_STARS, STATS_LABEL, bump_course_stats, recompute_course_stats
+
+# Fields of each model that feed the Course counters
+STATS_FIELDS = {
+    Lesson: ('course_id',),
+    Enrollment: ('course_id', 'is_active'),
+    Review: ('course_id', 'rating'),
+}
+
+
+def _stats_state(instance):
+    """
+    Snapshot the counter-relevant fields. Returns None when one of them is
+    deferred, so reading it here never triggers a query.
+    """
+    try:
+        return tuple(instance.__dict__[f] for f in STATS_FIELDS[type(instance)])
+    except KeyError:
+        return None
+
+
+def _contribution(instance, state):
+    """Return {counter: value} that a row in this state adds to its course"""
+    if isinstance(instance, Lesson):
+        return {'lessons_count': 1}
+    if isinstance(instance, Enrollment):
+        return {'students_count': 1 if state[1] else 0}
+    contribution = {'rating_sum': state[1] or 0, 'rating_count': 1}
+    if state[1] in RATING_STARS:
+        contribution[f'rating_{state[1]}_count'] = 1
+    return contribution
+
+
+def _bump_stats(course_id, **deltas):
+    bump_course_stats(course_id, **deltas)
+    if any(deltas.values()):
+        transaction.on_commit(lambda: bump_cache_version(STATS_LABEL))
+
+
+def _recount_stats(course_id):
+    recompute_course_stats(Course.objects.filter(pk=course_id))
+    transaction.on_commit(lambda: bump_cache_version(STATS_LABEL))
+
+
+@receiver(post_init, sender=Lesson)
+@receiver(post_init, sender=Enrollment)
+@receiver(post_init, sender=Review)
+def remember_stats_state(sender, instance, **kwargs):
+    instance._stats_state = _stats_state(instance)
+
+
+@receiver(post_save, sender=Lesson)
+@receiver(post_save, sender=Enrollment)
+@receiver(post_save, sender=Review)
+def update_stats_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+
+    old_state = getattr(instance, '_stats_state', None)
+    new_state = _stats_state(instance)
+    instance._stats_state = new_state
+
+    if created:
+        _bump_stats(new_state[0], **_contribution(instance, new_state))
+        return
+
+    if old_state is None or new_state is None:
+        # Loaded with deferred fields: the delta is unknown, recount instead
+        _recount_stats(instance.course_id)
+        return
+
+    if old_state == new_state:
+        return
+
+    old = _contribution(instance, old_state)
+    new = _contribution(instance, new_state)
+    if old_state[0] == new_state[0]:
+        _bump_stats(new_state[0], **{f: new.get(f, 0) - old.get(f, 0) for f in old.keys() | new.keys()})
+    else:
+        _bump_stats(old_state[0], **{f: -v for f, v in old.items()})
+        _bump_stats(new_state[0], **new)
+
+
+@receiver(post_delete, sender=Lesson)
+@receiver(post_delete, sender=Enrollment)
+@receiver(post_delete, sender=Review)
+def update_stats_on_delete(sender, instance, **kwargs):
+    state = _stats_state(instance)
+    if state is None:
+        _recount_stats(instance.course_id)
+        return
+    _bump_stats(state[0], **{f: -v for f, v in _contribution(instance, state).items()})
+
+
+def _progress_state(lesson):
+    """Snapshot the fields progress depends on, None when one is deferred"""
+    try:
+        return lesson.__dict__['course_id'], lesson.__dict__['is_published']
+    except KeyError:
+        return None
+
+
+@receiver(post_init, sender=Lesson)
+def remember_progress_state(sender, instance, **kwargs):
+    instance._progress_state = _progress_state(instance)
+
+
+@receiver(post_save, sender=Lesson)
+def refresh_progress_on_save(sender, instance, created, raw=False, **kwargs):
+    # Only adding, (un)publishing or moving a lesson changes the students' share
+    if raw:
+        return
+    old_state = getattr(instance, '_progress_state', None)
+    new_state = _progress_state(instance)
+    instance._progress_state = new_state
+    if not created and old_state is not None and old_state == new_state:
+        return
+
+    course_ids = {instance.course_id}
+    if not created and old_state is not None:
+        course_ids.add(old_state[0])
+    refresh_progress(Enrollment.objects.filter(course_id__in=course_ids))
+
+
+@receiver(post_delete, sender=Lesson)
+def refresh_progress_on_delete(sender, instance, **kwargs):
+    refresh_progress(Enrollment.objects.filter(course_id=instance.course_id))
+
+
+@receiver(post_init, sender=Course)
+def remember_published(sender, instance, **kwargs):
+    instance._was_published = instance.__dict__.get('is_published')
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def invalidate_course_feeds(sender, instance, raw=False, **kwargs):
+    # Only courses shown in the feeds, before or after this change, matter;
+    # a deferred is_published counts as shown
+    if raw:
+        return
+    was_published = getattr(instance, '_was_published', True)
+    instance._was_published = instance.__dict__.get('is_published')
+    if was_published is not False or instance.__dict__.get('is_published') is not False:
+        transaction.on_commit(lambda: bump_cache_version(FEED_LABEL))
+
+
+@receiver(post_save, sender=Course)
+def generate_thumbnail_derivatives(sender, instance, raw=False, update_fields=None, **kwargs):
+    if not raw:
+        schedule_derivatives(instance, 'thumbnail', update_fields)
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Lesson)
+@receiver(post_save, sender=Review)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Course)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Lesson)
+@receiver(post_delete, sender=Review)
+@receiver(post_delete, sender=Comment)
+def invalidate_page_cache(sender, **kwargs):
+    # After commit, or a request in between would cache the old rows under the new version
+    transaction.on_commit(lambda: bump_cache_version(sender))
+
+
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Enrollment)
+def invalidate_enrollment_access(sender, instance, **kwargs):
+    invalidate_enrollments(instance.user_id)
+    invalidate_dashboard(instance.user_id)
@@ -0,0 +1,66 @@
+"""
+Denormalized course statistics
+
+Course.lessons_count, students_count, rating_sum, rating_count and the
+rating histogram (rating_1_count .. rating_5_count) are kept in step with
+their source rows by the receivers in courses.signals.
+Bulk queryset operations (update(), bulk_create(), raw SQL) bypass those
+receivers, so recompute_course_stats() rebuilds the counters from scratch.
+
+Counter changes bump the STATS_LABEL cache version rather than the Course
+one, so enrollments and reviews only invalidate the pages that render
+counters (the catalog cards and the course shell), not every page and
+snapshot built from courses.
+"""
+from django.db.models import Count, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+
+STATS_LABEL = 'courses.course.stats'
+
+RATING_STARS = range(1, 6)
+RATING_FIELDS = ['rating_sum', 'rating_count', *(f'rating_{stars}_count' for stars in RATING_STARS)]
+
+
+def bump_course_stats(course_id, **deltas):
+    """
+    Apply signed deltas to the counters of one course in a single UPDATE.
+    Counters never drop below zero even if they drifted.
+    """
+    from .models import Course
+
+    updates = {
+        field: Greatest(F(field) + delta, Value(0)) if delta < 0 else F(field) + delta
+        for field, delta in deltas.items()
+        if delta
+    }
+    if course_id and updates:
+        Course.objects.filter(pk=course_id).update(**updates)
+
+
+def _per_course(model, aggregate, **filters):
+    return Coalesce(Subquery(
+        model.objects.filter(course=OuterRef('pk'), **filters)
+        .order_by().values('course').annotate(value=aggregate).values('value')
+    ), Value(0))
+
+
+def recompute_course_stats(courses=None):
+    """
+    Recompute every counter for the given courses (all courses by default)
+    with one correlated UPDATE. Returns the number of rows updated.
+    """
+    from .models import Course, Enrollment, Lesson, Review
+
+    if courses is None:
+        courses = Course.objects.all()
+
+    return courses.update(
+        lessons_count=_per_course(Lesson, Count('pk')),
+        students_count=_per_course(Enrollment, Count('pk'), is_active=True),
+        rating_sum=_per_course(Review, Sum('rating')),
+        rating_count=_per_course(Review, Count('pk')),
+        **{
+            f'rating_{stars}_count': _per_course(Review, Count('pk'), rating=stars)
+            for stars in RATING_STARS
+        },
+    )
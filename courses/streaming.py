@@ -0,0 +1,142 @@
+"""
+Serving protected media files (lesson videos) with HTTP Range support
+
+Players seek by requesting byte ranges, so ``serve_file`` answers
+``Range: bytes=...`` with 206 Partial Content and streams just that slice
+from the storage in fixed-size chunks; the file is never read into memory.
+If-Range is honoured and an unsatisfiable range gets 416.
+
+With MEDIA_OFFLOAD set, the access-checked response only carries a header
+and the web server streams the file itself, ranges included, so a long
+video never occupies a gunicorn thread:
+  - 'x-accel-redirect' (nginx): the file is served from
+    MEDIA_OFFLOAD_PREFIX + its storage name, which must be an ``internal``
+    location aliased to MEDIA_ROOT;
+  - 'x-sendfile' (Apache mod_xsendfile, lighttpd): the file's absolute path.
+
+MEDIA_ROOT/courses/videos/ must not also be served publicly by the web
+server, or the access checks can be bypassed.
+"""
+import mimetypes
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+CHUNK_SIZE = 64 * 1024
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def parse_range(header, size):
+    """
+    Return (start, end) for a single-range ``Range`` header, inclusive, or
+    None to serve the whole file (no header, multiple ranges, bad syntax).
+    Raises ValueError for a syntactically valid but unsatisfiable range.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError('range not satisfiable')
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError('range not satisfiable')
+    return start, end
+
+
+def _iter_range(file, start, length):
+    try:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
+
+
+def _range_applies(request, etag, modified):
+    """False if If-Range names a different version than the one we have"""
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == int(modified.timestamp())
+
+
+def _offload(storage, name, content_type):
+    response = HttpResponse(content_type=content_type)
+    if settings.MEDIA_OFFLOAD == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = quote(settings.MEDIA_OFFLOAD_PREFIX + name)
+    else:
+        response['X-Sendfile'] = storage.path(name)
+    return response
+
+
+def serve_file(request, storage, name, max_age=3600):
+    """
+    Respond with the content of the stored file ``name`` (or the requested
+    byte range of it) for a request that already passed its access checks.
+    The response may be kept by the browser for ``max_age`` seconds but by
+    no shared cache.
+    """
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+
+    if settings.MEDIA_OFFLOAD:
+        response = _offload(storage, name, content_type)
+    else:
+        try:
+            size = storage.size(name)
+            modified = storage.get_modified_time(name)
+        except FileNotFoundError:
+            raise Http404
+        etag = quote_etag(f'{size:x}-{int(modified.timestamp()):x}')
+
+        try:
+            byte_range = parse_range(request.headers.get('Range'), size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+        if byte_range is not None and not _range_applies(request, etag, modified):
+            byte_range = None
+
+        if request.method == 'HEAD':
+            response = HttpResponse(content_type=content_type)
+            response['Content-Length'] = size
+        elif byte_range is None:
+            # Whole file: lets the WSGI server use its file wrapper (sendfile)
+            response = FileResponse(storage.open(name, 'rb'), content_type=content_type)
+        else:
+            start, end = byte_range
+            length = end - start + 1
+            response = StreamingHttpResponse(
+                _iter_range(storage.open(name, 'rb'), start, length),
+                status=206,
+                content_type=content_type,
+            )
+            response['Content-Length'] = length
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(modified.timestamp())
+
+    response['Accept-Ranges'] = 'bytes'
+    patch_cache_control(response, private=True, max_age=max_age)
+    patch_vary_headers(response, ['Cookie'])
+    return response
@@ -0,0 +1,21 @@
+"""
+Cached category taxonomy for the catalog sidebar and filters
+(see config.taxonomy)
+"""
+from django.db.models import Q
+
+from config.taxonomy import CategorySnapshot
+from .models import Category, Course
+
+category_snapshot = CategorySnapshot(
+    Category, Course, 'courses', Q(courses__is_published=True), 'course_count',
+)
+
+
+def get_categories(with_courses=False):
+    """All categories annotated with ``course_count``, ordered by name"""
+    return category_snapshot.list(non_empty=with_courses)
+
+
+def get_category_or_404(slug):
+    return category_snapshot.get_or_404(slug)
@@ -0,0 +1,52 @@
+"""
+Responsive images from the derivatives of config.images
+
+    {% load image_tags %}
+    {% picture course.thumbnail alt=course.title sizes="(min-width: 992px) 33vw, 100vw" css_class="card-img-top" %}
+
+``picture`` renders a <picture> with a WebP and a JPEG srcset and falls
+back to a plain <img> of the original while the derivatives are missing.
+``srcset`` returns just the candidate list for hand-written markup.
+"""
+from django import template
+from django.core.files.storage import default_storage
+
+from config.images import FORMATS, derivative_name, get_manifest
+
+register = template.Library()
+
+
+def _srcset(manifest, fmt):
+    return ', '.join(
+        f"{default_storage.url(derivative_name(manifest['digest'], width, fmt))} {width}w"
+        for width in manifest['widths']
+    )
+
+
+@register.simple_tag
+def srcset(file, fmt='webp'):
+    """srcset candidates of an image field's derivatives in ``fmt``, or ''"""
+    manifest = get_manifest(file)
+    return _srcset(manifest, fmt) if manifest else ''
+
+
+@register.inclusion_tag('courses/partials/picture.html')
+def picture(file, alt='', sizes='100vw', css_class='', style='', loading='lazy', width=None, height=None):
+    manifest = get_manifest(file)
+    sources = []
+    if manifest:
+        sources = [
+            {'type': mime, 'srcset': _srcset(manifest, fmt)}
+            for fmt, (_ext, mime, _options) in FORMATS.items()
+        ]
+    return {
+        'url': file.url if file else '',
+        'sources': sources,
+        'alt': alt,
+        'sizes': sizes,
+        'css_class': css_class,
+        'style': style,
+        'loading': loading,
+        'width': width,
+        'height': height,
+    }
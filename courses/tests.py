@@ -1,3 +1,595 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from io import StringIO
+from urllib.parse import parse_qsl, urlsplit
+from unittest import skipUnless
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.management import call_command
+from django.http import Http404
+from django.db import connection
+from django.test import Client, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from config.cache import get_cache_versions
+from .access import ENROLLMENTS_KEY, _user_label, get_enrolled_course_ids
+from .feeds import CourseFeed
+from .catalog import COURSES_PER_PAGE, RELEVANCE, paginate_courses
+from .dashboard import get_dashboard
+from .htmx_views import COMMENTS_PER_PAGE
+from .models import Category, Comment, Course, Enrollment, Lesson, LessonCompletion, Review
+from .playback import flush_playback, get_resume_position, record_heartbeat
+from .signed_media import sign_media_params, verify_media_params
+from .stats import STATS_LABEL
+from .streaming import parse_range, serve_file
+from .taxonomy import category_snapshot, get_categories, get_category_or_404
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def create_user(username):
+    return get_user_model().objects.create_user(username, f'{username}@example.com', 'pass')
+
+
+def create_course(slug='course', instructor=None, **fields):
+    fields = {
+        'title': slug,
+        'description': slug,
+        'thumbnail': 'courses/thumbnails/test.jpg',
+        'price': 10,
+        'is_published': True,
+        **fields,
+    }
+    return Course.objects.create(slug=slug, instructor=instructor or create_user(f'teacher-{slug}'), **fields)
+
+
+def create_lesson(course, order=0, **fields):
+    return Lesson.objects.create(course=course, title=f'lesson {order}', order=order, **fields)
+
+
+class PlaybackTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = create_user('student')
+        self.course = create_course()
+        self.lesson = create_lesson(self.course)
+        self.enrollment = Enrollment.objects.create(user=self.user, course=self.course)
+
+    @override_settings(CACHE_ATOMIC_INCR=True, CACHES=LOCMEM_CACHE)
+    def test_flush_stores_summed_watched_seconds(self):
+        cache.clear()
+        with self.assertNumQueries(0):
+            for second in range(1, 6):
+                record_heartbeat(self.user.pk, self.course.pk, self.lesson.pk, second * 15, 15)
+        self.assertEqual(get_resume_position(self.user.pk, self.course.pk, self.lesson.pk), 75)
+
+        self.assertEqual(flush_playback(), 1)
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.watched_seconds, 75)
+        self.assertEqual(self.enrollment.last_position, 75)
+        self.assertEqual(self.enrollment.last_lesson_id, self.lesson.pk)
+
+        # A second flush has nothing left to add
+        self.assertEqual(flush_playback(), 0)
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.watched_seconds, 75)
+
+    @override_settings(CACHE_ATOMIC_INCR=False)
+    def test_heartbeats_are_written_directly_without_atomic_cache(self):
+        for second in range(1, 4):
+            record_heartbeat(self.user.pk, self.course.pk, self.lesson.pk, second * 15, 15)
+        # Capped at MAX_WATCHED_PER_HEARTBEAT
+        record_heartbeat(self.user.pk, self.course.pk, self.lesson.pk, 50, 10 ** 6)
+
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.watched_seconds, 45 + 30)
+        self.assertEqual(self.enrollment.last_position, 50)
+        self.assertEqual(get_resume_position(self.user.pk, self.course.pk, self.lesson.pk), 50)
+
+
+class EnrolledCourseIdsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = create_user('student')
+        self.course = create_course()
+
+    def _request(self):
+        request = RequestFactory().get('/')
+        request.user = self.user
+        return request
+
+    def test_enrollment_invalidates_cached_ids(self):
+        self.assertEqual(get_enrolled_course_ids(self._request()), frozenset())
+        with self.captureOnCommitCallbacks(execute=True):
+            Enrollment.objects.create(user=self.user, course=self.course)
+        self.assertEqual(get_enrolled_course_ids(self._request()), {self.course.pk})
+
+    def test_stale_write_after_invalidation_is_not_read(self):
+        # A reader that loaded the IDs before the enrollment committed
+        stale_key = ENROLLMENTS_KEY.format(self.user.pk, get_cache_versions([_user_label(self.user.pk)]))
+        with self.captureOnCommitCallbacks(execute=True):
+            Enrollment.objects.create(user=self.user, course=self.course)
+        cache.set(stale_key, frozenset())
+        self.assertEqual(get_enrolled_course_ids(self._request()), {self.course.pk})
+
+
+class LessonViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = create_user('student')
+        self.course = create_course()
+        self.lesson = create_lesson(self.course)
+        Enrollment.objects.create(user=self.user, course=self.course)
+        self.client.force_login(self.user)
+
+    def test_comments_are_paginated(self):
+        Comment.objects.bulk_create(
+            Comment(lesson=self.lesson, user=self.user, content=f'comment {i}')
+            for i in range(COMMENTS_PER_PAGE + 2)
+        )
+        response = self.client.get(reverse('courses:lesson', args=[self.course.slug, self.lesson.pk]))
+        self.assertEqual(len(response.context['comments']), COMMENTS_PER_PAGE)
+        self.assertContains(response, reverse('courses:load_more_comments', args=[self.lesson.pk]))
+
+
+class CourseStatsTests(TestCase):
+    def setUp(self):
+        self.course = create_course()
+        self.student = create_user('student')
+
+    def assertStats(self, **expected):
+        course = Course.objects.get(pk=self.course.pk)
+        self.assertEqual({field: getattr(course, field) for field in expected}, expected)
+
+    def test_lessons_count(self):
+        first = create_lesson(self.course, 1)
+        create_lesson(self.course, 2)
+        self.assertStats(lessons_count=2)
+        first.delete()
+        self.assertStats(lessons_count=1)
+
+    def test_lesson_moved_to_another_course(self):
+        other = create_course('other')
+        lesson = create_lesson(self.course)
+        lesson.course = other
+        lesson.save()
+        self.assertStats(lessons_count=0)
+        self.assertEqual(Course.objects.get(pk=other.pk).lessons_count, 1)
+
+    def test_students_count_follows_active_enrollments(self):
+        enrollment = Enrollment.objects.create(user=self.student, course=self.course)
+        Enrollment.objects.create(user=create_user('other'), course=self.course, is_active=False)
+        self.assertStats(students_count=1)
+
+        enrollment.is_active = False
+        enrollment.save()
+        self.assertStats(students_count=0)
+        enrollment.is_active = True
+        enrollment.save()
+        self.assertStats(students_count=1)
+
+        enrollment.delete()
+        self.assertStats(students_count=0)
+
+    def test_rating_counters_on_rate_rerate_and_delete(self):
+        review = Review.objects.create(course=self.course, user=self.student, rating=4)
+        Review.objects.create(course=self.course, user=create_user('other'), rating=5)
+        self.assertStats(rating_sum=9, rating_count=2, rating_4_count=1, rating_5_count=1)
+        self.assertEqual(Course.objects.get(pk=self.course.pk).average_rating, 4.5)
+
+        review.rating = 2
+        review.save()
+        self.assertStats(rating_sum=7, rating_count=2, rating_2_count=1, rating_4_count=0)
+
+        review.delete()
+        self.assertStats(rating_sum=5, rating_count=1, rating_2_count=0, rating_5_count=1)
+
+    def test_deferred_instance_is_recounted(self):
+        Enrollment.objects.create(user=self.student, course=self.course)
+        enrollment = Enrollment.objects.only('id', 'user_id').get()
+        enrollment.progress = 50
+        enrollment.save(update_fields=['progress'])
+        self.assertStats(students_count=1)
+        enrollment.delete()
+        self.assertStats(students_count=0)
+
+    def test_counters_never_drop_below_zero(self):
+        lesson = create_lesson(self.course)
+        Course.objects.filter(pk=self.course.pk).update(lessons_count=0)
+        lesson.delete()
+        self.assertStats(lessons_count=0)
+
+    @override_settings(CACHES=LOCMEM_CACHE)
+    def test_cached_course_shell_shows_new_students(self):
+        cache.clear()
+        self.client.force_login(self.student)
+        url = reverse('courses:detail', args=[self.course.slug])
+        self.assertContains(self.client.get(url), '<strong>0</strong>')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Enrollment.objects.create(user=create_user('other'), course=self.course)
+        self.assertContains(self.client.get(url), '<strong>1</strong>')
+
+    @override_settings(CACHES=LOCMEM_CACHE)
+    def test_counter_changes_leave_the_course_version_alone(self):
+        cache.clear()
+        course_version = get_cache_versions([Course])
+        stats_version = get_cache_versions([STATS_LABEL])
+        with self.captureOnCommitCallbacks(execute=True):
+            Enrollment.objects.create(user=self.student, course=self.course)
+            Review.objects.create(course=self.course, user=self.student, rating=5)
+        self.assertEqual(get_cache_versions([Course]), course_version)
+        self.assertNotEqual(get_cache_versions([STATS_LABEL]), stats_version)
+
+    def test_recompute_command_repairs_drift(self):
+        create_lesson(self.course)
+        Enrollment.objects.create(user=self.student, course=self.course)
+        Review.objects.create(course=self.course, user=self.student, rating=3)
+        Course.objects.update(lessons_count=9, students_count=9, rating_sum=9, rating_count=9, rating_3_count=0)
+
+        call_command('recompute_course_stats', stdout=StringIO())
+        self.assertStats(lessons_count=1, students_count=1, rating_sum=3, rating_count=1, rating_3_count=1)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class QueryBudgetTests(TestCase):
+    """The per-page query budgets documented in courses.models, courses.detail and courses.dashboard"""
+
+    def setUp(self):
+        cache.clear()
+        teacher = create_user('teacher')
+        self.courses = [
+            create_course(f'course-{i}', instructor=teacher, is_featured=True)
+            for i in range(COURSES_PER_PAGE * 2 + 1)
+        ]
+        self.student = create_user('student')
+        for course in self.courses[:3]:
+            create_lesson(course)
+            Enrollment.objects.create(user=self.student, course=course)
+            Review.objects.create(course=course, user=self.student, rating=4)
+
+    def _render_cards(self, courses):
+        return [
+            (course.title, course.total_lessons, course.total_students, course.average_rating,
+             course.category, course.instructor.get_full_name())
+            for course in courses
+        ]
+
+    def test_home_catalog(self):
+        catalog = Course.objects.published().with_card_stats().for_language()
+        with self.assertNumQueries(2):
+            self._render_cards(catalog.featured()[:6])
+            self._render_cards(catalog.order_by('-created_at')[:8])
+
+    def test_course_list_pages_cost_one_query(self):
+        # The first request also builds the category snapshot
+        response = self.client.get(reverse('courses:list'))
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('courses:list'))
+        self.assertEqual(len(response.context['courses']), COURSES_PER_PAGE)
+
+        next_page_url = response.context['next_page_url']
+        with self.assertNumQueries(1):
+            response = self.client.get(next_page_url)
+        self.assertEqual(len(response.context['courses']), COURSES_PER_PAGE)
+        with self.assertNumQueries(1):
+            response = self.client.get(response.context['next_page_url'])
+        self.assertEqual(len(response.context['courses']), 1)
+
+    def test_logged_in_course_detail(self):
+        self.client.force_login(self.student)
+        url = reverse('courses:detail', args=[self.courses[0].slug])
+        self.client.get(url)
+        # Session and user, then the enrollment set and shell come from the
+        # cache and only the review check is left
+        with self.assertNumQueries(3):
+            self.client.get(url)
+
+    def test_dashboard(self):
+        with self.assertNumQueries(2):
+            self.assertEqual(len(get_dashboard(self.student)), 3)
+        with self.assertNumQueries(0):
+            get_dashboard(self.student)
+
+
+class LessonProgressTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.student = create_user('student')
+        self.course = create_course()
+        self.lessons = [create_lesson(self.course, order) for order in range(4)]
+        create_lesson(self.course, 4, is_published=False)
+        self.enrollment = Enrollment.objects.create(user=self.student, course=self.course)
+        self.client.force_login(self.student)
+
+    def _post(self, lesson, completed=True):
+        url = reverse('courses:update_progress_htmx', args=[lesson.pk])
+        return self.client.post(url, {'completed': 'true' if completed else 'false'})
+
+    def _progress(self):
+        return Enrollment.objects.values_list('progress', flat=True).get(pk=self.enrollment.pk)
+
+    def test_completion_is_idempotent_and_exact(self):
+        for _ in range(3):
+            self.assertEqual(self._post(self.lessons[0]).status_code, 200)
+        self.assertEqual(self._progress(), 25)
+        self.assertEqual(LessonCompletion.objects.filter(enrollment=self.enrollment).count(), 1)
+
+        for lesson in self.lessons[1:]:
+            self._post(lesson)
+        self.assertEqual(self._progress(), 100)
+
+        self._post(self.lessons[0], completed=False)
+        self._post(self.lessons[0], completed=False)
+        self.assertEqual(self._progress(), 75)
+
+    def test_lesson_changes_that_affect_progress(self):
+        self._post(self.lessons[0])
+        create_lesson(self.course, 5)
+        self.assertEqual(self._progress(), 20)
+
+        self.lessons[3].is_published = False
+        self.lessons[3].save()
+        self.assertEqual(self._progress(), 25)
+
+        self.lessons[1].delete()
+        self.assertEqual(self._progress(), 33)
+
+    def test_other_lesson_edits_leave_progress_alone(self):
+        lesson = self.lessons[0]
+        lesson.title = 'renamed'
+        with CaptureQueriesContext(connection) as queries:
+            lesson.save()
+        self.assertFalse(any('courses_enrollment' in query['sql'] for query in queries.captured_queries))
+
+
+class RelevancePaginationTests(TestCase):
+    def _walk(self, query):
+        queryset = Course.objects.published().search(query)
+        seen, cursor = [], None
+        while True:
+            page = paginate_courses(queryset, RELEVANCE, cursor, per_page=3)
+            seen.extend(course.pk for course in page.object_list)
+            if not page.has_next:
+                return seen
+            cursor = page.next_cursor
+
+    def _create_courses(self):
+        teacher = create_user('teacher')
+        courses = [
+            create_course(f'python-{i}', instructor=teacher, title='Python basics')
+            for i in range(7)
+        ]
+        courses += [
+            create_course(f'other-{i}', instructor=teacher, title='Basics', description='python pythonic python')
+            for i in range(4)
+        ]
+        return courses
+
+    def test_ties_on_rank_are_not_skipped(self):
+        courses = self._create_courses()
+        seen = self._walk('pyth')
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(set(seen), {course.pk for course in courses})
+
+    @skipUnless(connection.vendor == 'postgresql', 'ts_rank is PostgreSQL-only')
+    def test_ts_rank_ties_survive_the_cursor(self):
+        courses = self._create_courses()
+        ranks = list(Course.objects.search('pyth').values_list('search_rank', flat=True))
+        self.assertLess(len(set(ranks)), len(ranks))
+        seen = self._walk('pyth')
+        self.assertEqual(sorted(seen), sorted(course.pk for course in courses))
+
+
+@override_settings(CACHES=LOCMEM_CACHE, IMAGE_DERIVATIVES_ASYNC=False)
+class CourseFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('courses:rss_feed')
+
+    def test_feed_is_ordered_by_publication(self):
+        old_draft = create_course('old-draft', is_published=False)
+        create_course('recent')
+        with self.captureOnCommitCallbacks(execute=True):
+            old_draft.is_published = True
+            old_draft.save()
+        items = list(CourseFeed().items())
+        self.assertEqual([course.slug for course in items], ['old-draft', 'recent'])
+        self.assertEqual(items[0].published_at, Course.objects.get(slug='old-draft').published_at)
+        self.assertGreater(items[0].published_at, items[0].created_at)
+
+    def test_etag_only_changes_on_publish(self):
+        course = create_course()
+        etag = self.client.get(self.url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Enrollment.objects.create(user=create_user('student'), course=course)
+            create_course('draft', is_published=False)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_course('published')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '/course/published/')
+
+
+@override_settings(CACHES=LOCMEM_CACHE, IMAGE_DERIVATIVES_ASYNC=False)
+class CategoryTaxonomyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        category_snapshot.clear()
+        self.web = Category.objects.create(name='web', slug='web')
+        self.art = Category.objects.create(name='art', slug='art')
+        create_course('draft', category=self.art, is_published=False)
+
+    def test_counts_published_courses(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            create_course('django', category=self.web)
+        self.assertEqual(
+            [(category.slug, category.course_count) for category in get_categories()],
+            [('art', 0), ('web', 1)],
+        )
+        self.assertEqual([category.slug for category in get_categories(with_courses=True)], ['web'])
+
+    def test_lookup_by_slug(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(get_category_or_404('web'), self.web)
+            self.assertEqual(get_category_or_404('art'), self.art)
+        with self.assertRaises(Http404):
+            get_category_or_404('missing')
+
+    def test_rebuilt_when_a_course_is_published(self):
+        self.assertEqual(get_categories(with_courses=True), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            create_course('painting', category=self.art)
+        self.assertEqual([category.slug for category in get_categories(with_courses=True)], ['art'])
+
+
+class SignedMediaTests(SimpleTestCase):
+    def setUp(self):
+        self.expires = 2_000_000_000
+        self.params = sign_media_params(7, 3, 'courses/videos/a.mp4', 'session', expires=self.expires)
+        self.now = self.expires - 60
+
+    def _verify(self, lesson_id=3, session_key='session', now=None, **changes):
+        params = {key: str(value) for key, value in {**self.params, **changes}.items()}
+        return verify_media_params(params, lesson_id, session_key, now=now or self.now)
+
+    def test_valid_signature(self):
+        self.assertEqual(self._verify(), ('courses/videos/a.mp4', self.expires))
+
+    def test_other_session_cookie_is_rejected(self):
+        self.assertIsNone(self._verify(session_key='other'))
+        self.assertIsNone(self._verify(session_key=''))
+
+    def test_tampered_params_are_rejected(self):
+        self.assertIsNone(self._verify(f='courses/videos/b.mp4'))
+        self.assertIsNone(self._verify(u=8))
+        self.assertIsNone(self._verify(e=self.expires + 300))
+        self.assertIsNone(self._verify(s='0' * 64))
+        self.assertIsNone(self._verify(u='x'))
+
+    def test_expired_url_is_rejected(self):
+        self.assertIsNone(self._verify(now=self.expires + 1))
+
+    def test_other_lesson_is_rejected(self):
+        self.assertIsNone(self._verify(lesson_id=4))
+
+
+class LessonVideoViewTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        cache.clear()
+        self.user = create_user('student')
+        self.course = create_course()
+        self.lesson = create_lesson(self.course)
+        self.lesson.video_file.save('lesson.mp4', ContentFile(b'0123456789'))
+        Enrollment.objects.create(user=self.user, course=self.course)
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('courses:lesson', args=[self.course.slug, self.lesson.pk]))
+        self.video_url = response.context['video_url']
+
+    def _with_params(self, **changes):
+        url = urlsplit(self.video_url)
+        params = {**dict(parse_qsl(url.query)), **changes}
+        return url.path, params
+
+    def test_signed_url_streams_the_file(self):
+        response = self.client.get(self.video_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+
+    def test_invalid_signature_is_forbidden(self):
+        path, params = self._with_params(s='0' * 64)
+        self.assertEqual(self.client.get(path, params).status_code, 403)
+        self.assertEqual(self.client.get(path).status_code, 403)
+
+    def test_url_of_another_lesson_is_forbidden(self):
+        other = create_lesson(self.course, order=1)
+        _, params = self._with_params()
+        path = reverse('courses:lesson_video', args=[other.pk])
+        self.assertEqual(self.client.get(path, params).status_code, 403)
+
+    def test_url_is_bound_to_the_session(self):
+        other_client = Client()
+        other_client.force_login(self.user)
+        self.assertEqual(other_client.get(self.video_url).status_code, 403)
+
+
+class ParseRangeTests(SimpleTestCase):
+    def test_ranges(self):
+        self.assertEqual(parse_range('bytes=2-5', 10), (2, 5))
+        self.assertEqual(parse_range('bytes=2-50', 10), (2, 9))
+        self.assertEqual(parse_range('bytes=4-', 10), (4, 9))
+        self.assertEqual(parse_range('bytes=-3', 10), (7, 9))
+        self.assertEqual(parse_range('bytes=-30', 10), (0, 9))
+
+    def test_whole_file(self):
+        for header in (None, '', 'bytes=-', 'bytes=0-1,4-5', 'items=0-1'):
+            self.assertIsNone(parse_range(header, 10))
+
+    def test_unsatisfiable(self):
+        for header, size in (('bytes=10-', 10), ('bytes=12-15', 10), ('bytes=5-2', 10),
+                             ('bytes=-0', 10), ('bytes=0-', 0), ('bytes=-5', 0)):
+            with self.assertRaises(ValueError, msg=header):
+                parse_range(header, size)
+
+
+@override_settings(MEDIA_OFFLOAD='')
+class ServeFileTests(SimpleTestCase):
+    def setUp(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location)
+        self.storage = FileSystemStorage(location=location)
+        self.storage.save('video.mp4', ContentFile(b'0123456789'))
+        self.storage.save('empty.mp4', ContentFile(b''))
+
+    def _get(self, name='video.mp4', **headers):
+        request = RequestFactory().get('/video/', headers=headers)
+        response = serve_file(request, self.storage, name)
+        content = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, content
+
+    def test_suffix_range(self):
+        response, content = self._get(Range='bytes=-3')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(content, b'789')
+        self.assertEqual(response['Content-Range'], 'bytes 7-9/10')
+        self.assertEqual(response['Content-Length'], '3')
+
+    def test_open_ended_range(self):
+        response, content = self._get(Range='bytes=6-')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(content, b'6789')
+        self.assertEqual(response['Content-Range'], 'bytes 6-9/10')
+
+    def test_range_past_the_end(self):
+        response, _ = self._get(Range='bytes=10-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */10')
+
+    def test_if_range(self):
+        etag = self._get()[0]['ETag']
+        response, content = self._get(Range='bytes=0-1', If_Range=etag)
+        self.assertEqual((response.status_code, content), (206, b'01'))
+        response, content = self._get(Range='bytes=0-1', If_Range='"other"')
+        self.assertEqual((response.status_code, content), (200, b'0123456789'))
+
+    def test_empty_file(self):
+        response, content = self._get('empty.mp4')
+        self.assertEqual((response.status_code, content), (200, b''))
+        for header in ('bytes=0-', 'bytes=-5'):
+            response, _ = self._get('empty.mp4', Range=header)
+            self.assertEqual(response.status_code, 416, header)
+            self.assertEqual(response['Content-Range'], 'bytes */0')
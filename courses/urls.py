@@ -1,24 +1,30 @@
 from django.urls import path
-from . import views, htmx_views
+from . import feeds, views, htmx_views
 
 app_name = 'courses'
 
 urlpatterns = [
     path('', views.home_view, name='home'),
     path('courses/', views.course_list_view, name='list'),
+    path('courses/feed/rss/', feeds.CourseRssFeed(), name='rss_feed'),
+    path('courses/feed/atom/', feeds.CourseAtomFeed(), name='atom_feed'),
     path('course/<slug:slug>/', views.course_detail_view, name='detail'),
     path('course/<slug:course_slug>/lesson/<int:lesson_id>/', views.lesson_view, name='lesson'),
+    path('lesson/<int:lesson_id>/video/', views.lesson_video_view, name='lesson_video'),
     path('course/<slug:course_slug>/review/', views.add_review_view, name='add_review'),
     path('category/<slug:slug>/', views.category_view, name='category'),
 
 # HTMX Endpoints
     path('htmx/courses/', htmx_views.course_list_htmx, name='list_htmx'),
+    path('htmx/courses/page/', htmx_views.course_page_htmx, name='page_htmx'),
     path('htmx/search/', htmx_views.search_courses_htmx, name='search_htmx'),
     path('htmx/lesson/<int:lesson_id>/comment/', htmx_views.add_comment_htmx, name='add_comment_htmx'),
     path('htmx/lesson/<int:lesson_id>/comments/', htmx_views.load_more_comments, name='load_more_comments'),
     path('htmx/course/<slug:course_slug>/review/', htmx_views.add_review_htmx, name='add_review_htmx'),
+    path('htmx/course/<slug:course_slug>/reviews/', htmx_views.reviews_htmx, name='reviews_htmx'),
     path('htmx/course/<slug:course_slug>/preview/', htmx_views.course_preview_htmx, name='preview_htmx'),
     path('htmx/lesson/<int:lesson_id>/progress/', htmx_views.update_progress_htmx, name='update_progress_htmx'),
+    path('htmx/lesson/<int:lesson_id>/heartbeat/', htmx_views.lesson_heartbeat_htmx, name='lesson_heartbeat_htmx'),
     path('htmx/comment/<int:comment_id>/delete/', htmx_views.delete_comment_htmx, name='delete_comment_htmx'),
     path('htmx/course/<slug:course_slug>/lesson/<int:lesson_id>/content/', htmx_views.lesson_htmx_content, name='lesson_htmx_content'),
 ]
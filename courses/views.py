@@ -1,32 +1,45 @@
+import time
+
 from django.shortcuts import render
 
 # Create your views here.
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.http import HttpResponseForbidden
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
 from django.utils.translation import gettext_lazy as _
+from django.views.decorators.http import require_http_methods
 from django.db.models import Q, Count, Avg
 from .models import Course, Category, Lesson, Comment, Review, Enrollment
 from .forms import CommentForm, ReviewForm
-
-
+from .catalog import catalog_context
+from .taxonomy import get_categories, get_category_or_404
+from .access import is_enrolled
+from .playback import get_resume_position
+from .signed_media import signed_media_url, verify_media_request
+from .streaming import serve_file
+from .detail import ACTIONS_SLOT, REVIEW_ACTIONS_SLOT, SHELL_MODELS, fill_slots, get_course_shell
+from .conditional import course_detail_validators
+from .stats import STATS_LABEL
+from .htmx_views import COMMENTS_PER_PAGE
+from config.cache import cache_anonymous_page
+from config.conditional import conditional_page
+from config.comments import load_comment_threads
+
+
+@cache_anonymous_page(Course, Category, STATS_LABEL)
 def home_view(request):
     """
     Homepage with featured courses
     Template: courses/home.html
     """
-    featured_courses = Course.objects.filter(
-        is_published=True,
-        is_featured=True
-    ).select_related('category', 'instructor')[:6]
-
-    recent_courses = Course.objects.filter(
-        is_published=True
-    ).select_related('category', 'instructor').order_by('-created_at')[:8]
+    catalog = Course.objects.published().with_card_stats().for_language()
+    featured_courses = catalog.featured()[:6]
+    recent_courses = catalog.order_by('-created_at')[:8]
 
-    categories = Category.objects.annotate(
-        course_count=Count('courses')
-    ).filter(course_count__gt=0)
+    categories = get_categories(with_courses=True)
 
     context = {
         'featured_courses': featured_courses,
@@ -38,91 +51,42 @@ def home_view(request):
 
 def course_list_view(request):
     """
-    List all published courses with filtering
+    List all published courses with filtering and cursor pagination
     Template: courses/course_list.html
     """
-    courses = Course.objects.filter(is_published=True).select_related(
-        'category', 'instructor'
-    )
-
-    # Category filter
-    category_slug = request.GET.get('category')
-    if category_slug:
-        courses = courses.filter(category__slug=category_slug)
-
-    # Difficulty filter
-    difficulty = request.GET.get('difficulty')
-    if difficulty:
-        courses = courses.filter(difficulty=difficulty)
-
-    # Search
-    search_query = request.GET.get('q')
-    if search_query:
-        courses = courses.filter(
-            Q(title__icontains=search_query) |
-            Q(title_en__icontains=search_query) |
-            Q(description__icontains=search_query)
-        )
-
-    # Sorting
-    sort_by = request.GET.get('sort', '-created_at')
-    if sort_by in ['-created_at', 'price', '-price', 'title']:
-        courses = courses.order_by(sort_by)
-
-    categories = Category.objects.all()
-
-    context = {
-        'courses': courses,
-        'categories': categories,
-        'selected_category': category_slug,
-        'selected_difficulty': difficulty,
-        'search_query': search_query,
-    }
+    context = catalog_context(request)
+    context['categories'] = get_categories()
     return render(request, 'courses/course_list.html', context)
 
 
+@conditional_page(course_detail_validators)
+@cache_anonymous_page(*SHELL_MODELS)
 def course_detail_view(request, slug):
     """
     Detailed course view with lessons and reviews
     Template: courses/course_detail.html
     """
-    course = get_object_or_404(
-        Course.objects.select_related('category', 'instructor'),
-        slug=slug,
-        is_published=True
-    )
-
-    # Lessons are available if the course is published
-    lessons = course.lessons.all().order_by('order', 'created_at')
-    preview_lessons = lessons.filter(is_preview=True)
+    # Shared, cached part of the page (see courses.detail)
+    shell, course = get_course_shell(request, slug)
 
     # Check if user is enrolled
-    is_enrolled = False
-    if request.user.is_authenticated:
-        is_enrolled = Enrollment.objects.filter(
-            user=request.user,
-            course=course,
-            is_active=True
-        ).exists()
-
-    # Get reviews
-    reviews = course.reviews.select_related('user').all()
-    avg_rating = course.average_rating
-
-    # Check if user has reviewed
-    user_review = None
-    if request.user.is_authenticated:
-        user_review = reviews.filter(user=request.user).first()
+    enrolled = is_enrolled(request, course['pk'])
+
+    # Check if user has reviewed (only enrolled users can review)
+    user_review = enrolled and Review.objects.filter(
+        user=request.user,
+        course_id=course['pk']
+    ).exists()
 
     context = {
         'course': course,
-        'lessons': lessons,
-        'preview_lessons': preview_lessons,
-        'is_enrolled': is_enrolled,
-        'reviews': reviews,
-        'avg_rating': avg_rating,
+        'is_enrolled': enrolled,
         'user_review': user_review,
     }
+    context['shell'] = mark_safe(fill_slots(shell, {
+        ACTIONS_SLOT: render_to_string('courses/partials/course_actions.html', context, request=request),
+        REVIEW_ACTIONS_SLOT: render_to_string('courses/partials/review_actions.html', context, request=request),
+    }))
     return render(request, 'courses/course_detail.html', context)
 
 
@@ -136,21 +100,13 @@ def lesson_view(request, course_slug, lesson_id):
     lesson = get_object_or_404(Lesson, id=lesson_id, course=course)
 
     # Check enrollment or if it's a preview lesson
-    is_enrolled = Enrollment.objects.filter(
-        user=request.user,
-        course=course,
-        is_active=True
-    ).exists()
-
-    if not (is_enrolled or lesson.is_preview):
+    enrolled = is_enrolled(request, course)
+    if not (enrolled or lesson.is_preview):
         messages.error(request, _('يجب التسجيل في الدورة لمشاهدة هذا الدرس'))
         return redirect('courses:detail', slug=course_slug)
 
-    # Get comments
-    comments = lesson.comments.filter(
-        is_active=True,
-        parent=None
-    ).select_related('user').prefetch_related('replies')
+    # Get the first page of comment threads (two queries however many replies)
+    comments = load_comment_threads(lesson.comments.all(), limit=COMMENTS_PER_PAGE, is_active=True)
 
     # Handle comment form
     if request.method == 'POST':
@@ -180,10 +136,29 @@ def lesson_view(request, course_slug, lesson_id):
         'comments': comments,
         'form': form,
         'all_lessons': all_lessons,
+        'is_enrolled': enrolled,
+        'resume_at': get_resume_position(request.user.pk, course.pk, lesson.pk) if enrolled else 0,
+        'video_url': signed_media_url(request, lesson, lesson.video_file) if lesson.video_file else '',
     }
     return render(request, 'courses/lesson.html', context)
 
 
+@require_http_methods(["GET", "HEAD"])
+def lesson_video_view(request, lesson_id):
+    """
+    Stream a lesson's uploaded video, with byte ranges for seeking. Access
+    was checked by the lesson page that signed the URL (see
+    courses.signed_media), so no query is made here.
+    """
+    signed = verify_media_request(request, lesson_id)
+    if signed is None:
+        return HttpResponseForbidden()
+
+    name, expires = signed
+    storage = Lesson._meta.get_field('video_file').storage
+    return serve_file(request, storage, name, max_age=max(int(expires - time.time()), 0))
+
+
 @login_required
 def add_review_view(request, course_slug):
     """
@@ -193,13 +168,7 @@ def add_review_view(request, course_slug):
     course = get_object_or_404(Course, slug=course_slug, is_published=True)
 
     # Check if enrolled
-    is_enrolled = Enrollment.objects.filter(
-        user=request.user,
-        course=course,
-        is_active=True
-    ).exists()
-
-    if not is_enrolled:
+    if not is_enrolled(request, course):
         messages.error(request, _('يجب التسجيل في الدورة لإضافة تقييم'))
         return redirect('courses:detail', slug=course_slug)
 
@@ -226,16 +195,16 @@ def add_review_view(request, course_slug):
     return render(request, 'courses/add_review.html', context)
 
 
+@cache_anonymous_page(Course, Category, STATS_LABEL)
 def category_view(request, slug):
     """
     View courses by category
     Template: courses/category.html
     """
-    category = get_object_or_404(Category, slug=slug)
-    courses = Course.objects.filter(
-        category=category,
-        is_published=True
-    ).select_related('instructor')
+    category = get_category_or_404(slug)
+    courses = Course.objects.published().with_card_stats().for_language().filter(
+        category=category
+    )
 
     context = {
         'category': category,
@@ -0,0 +1,20 @@
+# Generated by Django 6.0.1 on 2026-10-18 00:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0007_hot_query_indexes'),
+        ('payments', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['stripe_payment_intent_id'], name='payment_intent_idx'),
+        ),
+    ]
@@ -69,6 +69,9 @@ class Payment(models.Model):
         verbose_name = _('دفعة')
         verbose_name_plural = _('الدفعات')
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['stripe_payment_intent_id'], name='payment_intent_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.course.title} - {self.amount} {self.currency}"
@@ -15,6 +15,7 @@ import logging
 logger = logging.getLogger(__name__)
 
 from courses.models import Course, Enrollment
+from courses.access import is_enrolled
 from .models import Payment, Order
 
 # Configure Stripe
@@ -30,7 +31,7 @@ def create_checkout_session(request, course_slug):
     course = get_object_or_404(Course, slug=course_slug, is_published=True)
 
     # Check if already enrolled
-    if Enrollment.objects.filter(user=request.user, course=course, is_active=True).exists():
+    if is_enrolled(request, course):
         messages.info(request, _('أنت مسجل بالفعل في هذه الدورة'))
         return redirect('courses:detail', slug=course_slug)
 
@@ -181,14 +182,10 @@ def payment_success(request):
             logger.error(f"Fallback verification error: {str(e)}")
     
     # Check enrollment status
-    is_enrolled = Enrollment.objects.filter(
-        user=request.user, 
-        course=order.course, 
-        is_active=True
-    ).exists()
+    enrolled = is_enrolled(request, order.course_id)
     
     # If still pending, show appropriate message
-    if order.status == 'pending' and not is_enrolled:
+    if order.status == 'pending' and not enrolled:
         context = {
             'order': order,
             'course': order.course,
@@ -201,7 +198,7 @@ def payment_success(request):
     context = {
         'order': order,
         'course': order.course,
-        'is_enrolled': is_enrolled,
+        'is_enrolled': enrolled,
         'pending': False,
     }
     return render(request, 'payments/success.html', context)
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-18 00:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_set_site_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='avatar_derivatives',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='نسخ الصورة الشخصية'),
+        ),
+    ]
@@ -16,6 +16,9 @@ class CustomUser(AbstractUser):
         blank=True,
         null=True
     )
+    avatar_derivatives = models.JSONField(
+        _('نسخ الصورة الشخصية'), default=dict, blank=True, editable=False
+    )
     date_of_birth = models.DateField(_('تاريخ الميلاد'), blank=True, null=True)
 
     # Enrollment tracking
@@ -42,7 +45,13 @@ class CustomUser(AbstractUser):
         full_name = f"{self.first_name} {self.last_name}".strip()
         return full_name or self.username
 
+    @property
+    def roles(self):
+        """Group names and staff flags, loaded once per request (see users.roles)"""
+        from .roles import get_roles
+        return get_roles(self)
+
     @property
     def is_instructor(self):
         """Check if user is an instructor"""
-        return self.groups.filter(name='Instructors').exists() or self.is_staff
\ No newline at end of file
+        return self.roles.is_instructor
\ No newline at end of file
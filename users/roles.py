@@ -0,0 +1,77 @@
+"""
+User roles (group names, instructor, staff) loaded once per request
+
+``CustomUser.roles`` memoizes the roles on the user instance, so every
+check during a request after the first is free. With UserRolesMiddleware
+the group names are also kept in the session next to a version stamp, so
+later requests skip the groups query as long as the stamp is current.
+
+The stamp combines a per-user version, bumped when the user's group
+membership changes, with the Group model version, bumped when a group is
+renamed, deleted or cleared of its members (see users.signals). A
+missing version key (evicted or flushed) counts as stale, since the
+session outlives it. Staff and
+superuser flags come from the user row, which is loaded fresh on every
+request anyway.
+"""
+from typing import NamedTuple
+
+from django.contrib.auth.models import Group
+from django.db import transaction
+
+from config.cache import bump_cache_version, get_stored_cache_versions
+
+INSTRUCTORS_GROUP = 'Instructors'
+ROLES_SESSION_KEY = '_user_roles'
+
+
+class Roles(NamedTuple):
+    groups: frozenset
+    is_staff: bool
+    is_superuser: bool
+
+    @property
+    def is_instructor(self):
+        return INSTRUCTORS_GROUP in self.groups or self.is_staff
+
+    def in_group(self, name):
+        return name in self.groups
+
+
+def _label(user_id):
+    return f'roles.user.{user_id}'
+
+
+def invalidate_roles(user_ids):
+    """Make the stored roles of the given users stale once the transaction commits"""
+    def bump():
+        for user_id in user_ids:
+            bump_cache_version(_label(user_id))
+    transaction.on_commit(bump)
+
+
+def bind_roles_session(user, session):
+    """Let an authenticated ``user`` keep its roles in ``session``; returns the user"""
+    if user.is_authenticated:
+        user._roles_session = session
+    return user
+
+
+def get_roles(user):
+    roles = user.__dict__.get('_roles')
+    if roles is not None:
+        return roles
+
+    session = user.__dict__.get('_roles_session')
+    version, complete = get_stored_cache_versions([_label(user.pk), Group])
+    stored = session.get(ROLES_SESSION_KEY) if session is not None and complete else None
+    if stored and stored.get('version') == version:
+        groups = frozenset(stored['groups'])
+    else:
+        groups = frozenset(user.groups.values_list('name', flat=True))
+        if session is not None:
+            session[ROLES_SESSION_KEY] = {'version': version, 'groups': sorted(groups)}
+
+    roles = Roles(groups, user.is_staff, user.is_superuser)
+    user._roles = roles
+    return roles
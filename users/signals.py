@@ -1,4 +1,6 @@
-from django.db.models.signals import post_save
+from django.contrib.auth.models import Group
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
 from django.core.mail import send_mail, EmailMultiAlternatives
 from django.conf import settings
@@ -7,7 +9,10 @@ from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 from django.utils import timezone
 from allauth.account.signals import user_signed_up, user_logged_in, password_changed
+from config.cache import bump_cache_version
+from config.images import schedule_derivatives
 from .models import CustomUser
+from .roles import invalidate_roles
 
 
 def send_html_email(subject, html_template, context, recipient_list):
@@ -71,6 +76,38 @@ def send_login_notification(request, user, **kwargs):
     )
 
 
+@receiver(post_save, sender=CustomUser)
+def generate_avatar_derivatives(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Generate the resized copies of a new avatar in the background
+    """
+    if not raw:
+        schedule_derivatives(instance, 'avatar', update_fields)
+
+
+@receiver(m2m_changed, sender=CustomUser.groups.through)
+def invalidate_user_roles(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Make the roles stored in the sessions of the affected users stale
+    """
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        instance.__dict__.pop('_roles', None)
+        invalidate_roles([instance.pk])
+    elif pk_set:
+        invalidate_roles(pk_set)
+    else:
+        # group.user_set.clear() does not tell which users were members
+        transaction.on_commit(lambda: bump_cache_version(Group))
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_roles(sender, **kwargs):
+    transaction.on_commit(lambda: bump_cache_version(Group))
+
+
 @receiver(password_changed)
 def send_password_changed_email(request, user, **kwargs):
     """
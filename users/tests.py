@@ -1,3 +1,51 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 
-# Create your tests here.
+from .roles import INSTRUCTORS_GROUP, ROLES_SESSION_KEY, bind_roles_session
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class UserRolesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user('teacher', 'teacher@example.com', 'pass')
+        self.group = Group.objects.create(name=INSTRUCTORS_GROUP)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.groups.add(self.group)
+        self.session = {}
+
+    def _request_user(self):
+        """The user as the middleware hands it to a new request"""
+        user = get_user_model().objects.get(pk=self.user.pk)
+        return bind_roles_session(user, self.session)
+
+    def test_roles_are_reused_from_the_session(self):
+        self.assertTrue(self._request_user().is_instructor)
+        user = self._request_user()
+        with self.assertNumQueries(0):
+            self.assertTrue(user.is_instructor)
+
+    def test_removing_the_group_revokes_the_role_on_the_next_request(self):
+        self.assertTrue(self._request_user().is_instructor)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group.user_set.remove(self.user)
+        self.assertFalse(self._request_user().is_instructor)
+
+    def test_evicted_versions_do_not_revive_an_old_stamp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group.user_set.remove(self.user)
+        self.assertFalse(self._request_user().is_instructor)
+        # After an eviction the bump restarts the counter at the old value
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group.user_set.add(self.user)
+        self.assertTrue(self._request_user().is_instructor)
+        user = self._request_user()
+        with self.assertNumQueries(0):
+            self.assertTrue(user.is_instructor)
+        self.assertEqual(self.session[ROLES_SESSION_KEY]['groups'], [INSTRUCTORS_GROUP])
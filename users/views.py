@@ -5,6 +5,8 @@ from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.utils.translation import gettext_lazy as _
+from courses.dashboard import get_dashboard
+from courses.playback import get_playback_states
 from .forms import UserProfileForm
 
 
@@ -26,6 +28,7 @@ def profile_view(request):
     context = {
         'form': form,
         'user': request.user,
+        'enrolled_count': len(get_dashboard(request.user)),
     }
     return render(request, 'users/profile.html', context)
 
@@ -36,9 +39,22 @@ def dashboard_view(request):
     User dashboard showing enrolled courses and progress
     Template: users/dashboard.html
     """
-    enrolled_courses = request.user.enrolled_courses.all()
+    # Cached per user; two queries when it has to be rebuilt
+    enrollments = get_dashboard(request.user)
+
+    # Playback heartbeats that are not flushed yet are newer than the stored state
+    states = get_playback_states(request.user.pk, [enrollment.course_id for enrollment in enrollments])
+    for enrollment in enrollments:
+        state = states.get(enrollment.course_id)
+        if state:
+            enrollment.last_lesson_id = state['lesson_id']
+            enrollment.last_accessed_at = state['at']
+    started = [enrollment for enrollment in enrollments if enrollment.last_lesson_id]
 
     context = {
-        'enrolled_courses': enrolled_courses,
+        'enrollments': enrollments,
+        'completed_count': sum(enrollment.progress >= 100 for enrollment in enrollments),
+        'watched_hours': sum(enrollment.watched_seconds for enrollment in enrollments) // 3600,
+        'continue_enrollment': max(started, key=lambda enrollment: enrollment.last_accessed_at, default=None),
     }
     return render(request, 'users/dashboard.html', context)
\ No newline at end of file